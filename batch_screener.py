@@ -5,16 +5,159 @@ Reconstructed from single-stock analysis system for screening hundreds of stocks
 
 import asyncio
 import concurrent.futures
+import functools
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
+import os
+import re
 import time
 from pathlib import Path
 import json
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional, fall back to the stdlib parser
+    _json_loads = json.loads
+
+# Markdown code fences around LLM JSON output
+_FENCE_RE = re.compile(r'^```(?:json)?|```$', re.M)
+
+# Agent types used for composite scoring, matched as substrings of the agent name
+_AGENT_KEYS = ('technical', 'fundamental', 'sentiment', 'valuation')
+
+# Spot snapshots are reused for this many seconds
+SPOT_SNAPSHOT_TTL = 60
+
+@functools.lru_cache(maxsize=1)
+def _spot_snapshot(ttl_bucket: int) -> pd.DataFrame:
+    """Fetch the A-share spot snapshot, cached per TTL bucket"""
+    import akshare as ak
+    return ak.stock_zh_a_spot_em()
+
+def get_spot_snapshot() -> pd.DataFrame:
+    """Get the process-wide spot snapshot shared by all screening stages"""
+    return _spot_snapshot(int(time.time() / SPOT_SNAPSHOT_TTL))
+
+# Technical factor order used by the vectorized scoring kernel
+TECHNICAL_FACTORS = ('momentum_score', 'trend_score', 'volatility_score', 'volume_score')
+
+def _score_matrix(close: np.ndarray, volume: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Four-factor technical score kernel, one value per symbol column
+    
+    Args:
+        close: (dates x symbols) close prices, NaN-padded at the top
+        volume: (dates x symbols) volumes, same layout as close
+        weights: factor weights in TECHNICAL_FACTORS order
+    """
+    returns = np.diff(close, axis=0) / close[:-1]
+    factors = np.empty((len(TECHNICAL_FACTORS), close.shape[1]), dtype=close.dtype)
+    
+    # Momentum score
+    momentum_20d = np.nansum(returns[-20:], axis=0)
+    np.clip(momentum_20d * 5 + 0.5, 0, 1, out=factors[0])
+    
+    # Trend score (MA analysis)
+    trend_strength = (close[-5:].mean(axis=0) / close[-20:].mean(axis=0) - 1) * 10 + 0.5
+    np.clip(trend_strength, 0, 1, out=factors[1])
+    
+    # Volatility score (lower is better)
+    volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(np.float32(252))
+    np.maximum(0, 1 - volatility * 2, out=factors[2])
+    
+    # Volume score
+    vol_ratio = volume[-5:].mean(axis=0) / volume[-20:].mean(axis=0)
+    np.clip((vol_ratio - 0.5) * 2, 0, 1, out=factors[3])
+    
+    # Composite technical score: one weighted sum over the stacked factors
+    return weights @ factors
+
+# Sidecar cache of recent price bars used by the technical screener. Bars are
+# back-adjusted (hfq): unlike qfq, past hfq prices do not change after a new
+# ex-dividend date, so newly fetched bars can be appended to cached ones
+PRICE_CACHE_DIR = Path(__file__).parent / "src" / "data" / "screener_prices_hfq"
+
+# Concurrent price requests during technical screening, and the per-request timeout (seconds)
+PRICE_FETCH_WORKERS = 32
+PRICE_FETCH_TIMEOUT = 30
+
+class PriceCache:
+    """Columnar on-disk store of recent daily bars for many symbols
+    
+    Every symbol lives in one set of parallel column files (symbol/date/close/volume
+    .npy) sorted by symbol. Columns are memory-mapped on load, so per-symbol access
+    is a zero-copy slice located with a binary search.
+    """
+    
+    COLUMNS = {'symbol': 'U6', 'date': 'U10', 'close': np.float32, 'volume': np.float32}
+    
+    def __init__(self, cache_dir: Path = PRICE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._columns = {name: np.array([], dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self._updates: Dict[str, Dict[str, np.ndarray]] = {}
+        self._load()
+        
+    def _load(self):
+        """Memory-map the column files"""
+        try:
+            if all((self.cache_dir / f"{name}.npy").exists() for name in self.COLUMNS):
+                self._columns = {
+                    name: np.load(self.cache_dir / f"{name}.npy", mmap_mode='r')
+                    for name in self.COLUMNS
+                }
+        except Exception as e:
+            logging.warning(f"Error loading price cache: {e}")
+            
+    def get(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Get the cached date/close/volume bars of one symbol"""
+        if symbol in self._updates:
+            return self._updates[symbol]
+            
+        symbols = self._columns['symbol']
+        lo = np.searchsorted(symbols, symbol, side='left')
+        hi = np.searchsorted(symbols, symbol, side='right')
+        return {name: self._columns[name][lo:hi] for name in ('date', 'close', 'volume')}
+    
+    def set(self, symbol: str, bars: Dict[str, np.ndarray]):
+        """Replace the cached bars of one symbol (written on save)"""
+        self._updates[symbol] = bars
+        
+    def save(self):
+        """Merge pending updates into the columns and write them atomically"""
+        if not self._updates:
+            return
+            
+        try:
+            keep = ~np.isin(self._columns['symbol'], list(self._updates))
+            parts = {name: [np.asarray(self._columns[name][keep])] for name in self.COLUMNS}
+            for symbol, bars in self._updates.items():
+                parts['symbol'].append(np.full(len(bars['date']), symbol, dtype='U6'))
+                for name in ('date', 'close', 'volume'):
+                    parts[name].append(bars[name])
+                    
+            columns = {
+                name: np.concatenate(parts[name]).astype(dtype, copy=False)
+                for name, dtype in self.COLUMNS.items()
+            }
+            # Stable sort keeps each symbol's bars in date order
+            order = np.argsort(columns['symbol'], kind='stable')
+            
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for name, values in columns.items():
+                # Replace rather than overwrite, existing maps keep the old file
+                tmp_path = self.cache_dir / f"{name}.tmp.npy"
+                np.save(tmp_path, values[order])
+                os.replace(tmp_path, self.cache_dir / f"{name}.npy")
+                
+            self._updates.clear()
+            self._load()
+        except Exception as e:
+            logging.warning(f"Error saving price cache: {e}")
+
 # Core data structures
 @dataclass
 class StockAnalysis:
@@ -37,6 +180,7 @@ class ScreeningConfig:
     min_liquidity_days: int = 250
     exclude_st_stocks: bool = True
     max_stocks_full_analysis: int = 50
+    full_analysis_score_quantile: float = 0.5  # Skip candidates below this technical-score quantile
     target_top_picks: int = 10
 
 class StockUniverse:
@@ -47,22 +191,31 @@ class StockUniverse:
         
     def get_stock_list(self) -> List[str]:
         """Get initial stock universe"""
+        return self.get_stock_list_with_snapshot()[0]
+        
+    def get_stock_list_with_snapshot(self) -> Tuple[List[str], Optional[pd.DataFrame]]:
+        """Get initial stock universe and, when it was needed anyway, the spot snapshot
+        
+        Index universes come from the constituent list, so the snapshot is not
+        fetched for them (None); QuickFilter fetches it when it runs.
+        """
         try:
+            import akshare as ak
+            
             if self.config.stock_universe == "CSI300":
                 # Fetch CSI300 constituents
-                import akshare as ak
                 df = ak.index_stock_cons("000300")
-                return df['品种代码'].tolist()
+                return df['品种代码'].tolist(), None
             elif self.config.stock_universe == "CSI500":
                 df = ak.index_stock_cons("000905")
-                return df['品种代码'].tolist()
+                return df['品种代码'].tolist(), None
             else:
                 # All A-shares (be careful with API limits!)
-                df = ak.stock_zh_a_spot_em()
-                return df['代码'].tolist()
+                snapshot = get_spot_snapshot()
+                return snapshot['代码'].tolist(), snapshot
         except Exception as e:
             logging.error(f"Error fetching stock universe: {e}")
-            return []
+            return [], None
 
 class QuickFilter:
     """First stage filtering to eliminate obvious non-candidates"""
@@ -70,34 +223,32 @@ class QuickFilter:
     def __init__(self, config: ScreeningConfig):
         self.config = config
         
-    def filter_stocks(self, symbols: List[str]) -> List[str]:
-        """Apply basic financial and liquidity filters"""
+    def filter_stocks(self, symbols: List[str], snapshot: Optional[pd.DataFrame] = None) -> List[str]:
+        """Apply basic financial and liquidity filters, reusing the universe snapshot if given"""
         filtered = []
         
         try:
-            import akshare as ak
+            # Get market overview data, one row per requested symbol (in request order)
+            if snapshot is None or snapshot.empty:
+                snapshot = get_spot_snapshot()
+            market_data = snapshot.drop_duplicates('代码').set_index('代码')
+            stocks = market_data.loc[[symbol for symbol in dict.fromkeys(symbols) if symbol in market_data.index]]
             
-            # Get market overview data
-            market_data = ak.stock_zh_a_spot_em()
+            # Apply filters as one vectorized mask over the whole frame
+            market_cap = pd.to_numeric(stocks['总市值'], errors='coerce')
+            volume = pd.to_numeric(stocks['成交额'], errors='coerce')
+            pe_ratio = pd.to_numeric(stocks['市盈率-动态'], errors='coerce')
             
-            for symbol in symbols:
-                stock_info = market_data[market_data['代码'] == symbol]
-                if stock_info.empty:
-                    continue
-                    
-                stock = stock_info.iloc[0]
-                
-                # Apply filters
-                market_cap = float(stock.get('总市值', 0))
-                volume = float(stock.get('成交额', 0))
-                pe_ratio = float(stock.get('市盈率-动态', 999))
+            mask = (
+                (market_cap >= self.config.min_market_cap) &
+                (volume >= self.config.min_daily_volume) &
+                (pe_ratio > 0) & (pe_ratio <= self.config.max_pe_ratio)
+            )
+            if self.config.exclude_st_stocks:
+                names = stocks['名称'].fillna('').to_numpy(dtype=str)
+                mask &= np.char.find(names, 'ST') == -1
                 
-                # Check if stock meets criteria
-                if (market_cap >= self.config.min_market_cap and
-                    volume >= self.config.min_daily_volume and
-                    0 < pe_ratio <= self.config.max_pe_ratio and
-                    (not self.config.exclude_st_stocks or 'ST' not in stock.get('名称', ''))):
-                    filtered.append(symbol)
+            filtered = stocks.index[mask].tolist()
                     
         except Exception as e:
             logging.error(f"Error in quick filtering: {e}")
@@ -116,113 +267,232 @@ class TechnicalScreener:
             'volatility_score': 0.2,
             'volume_score': 0.2
         }
+        # Recent close/volume bars per symbol, so re-runs only fetch new bars
+        self._rolling_cache = PriceCache()
         
     def screen_stocks(self, symbols: List[str]) -> List[Tuple[str, float]]:
-        """Apply technical analysis and score stocks"""
-        results = []
-        
-        # Use parallel processing for technical analysis
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-            futures = {
-                executor.submit(self._analyze_single_stock, symbol): symbol 
-                for symbol in symbols
-            }
+        """Apply technical analysis and score stocks
+
+        Must be called outside a running event loop; use screen_stocks_bulk from async code.
+        """
+        return asyncio.run(self.screen_stocks_bulk(symbols))
+
+    async def screen_stocks_bulk(self, symbols: List[str]) -> List[Tuple[str, float]]:
+        """Score all stocks at once on a stacked (dates x symbols) price matrix"""
+        close, volume, valid_symbols = await self._fetch_price_matrix(symbols)
+        if not valid_symbols:
+            logging.info(f"Technical screening: {len(symbols)} -> 0 stocks")
+            return []
             
-            for future in concurrent.futures.as_completed(futures):
-                symbol = futures[future]
-                try:
-                    tech_score = future.result(timeout=30)
-                    if tech_score is not None:
-                        results.append((symbol, tech_score))
-                except Exception as e:
-                    logging.warning(f"Technical analysis failed for {symbol}: {e}")
-                    
-        # Sort by technical score and return top candidates
-        results.sort(key=lambda x: x[1], reverse=True)
-        top_count = min(50, len(results))
+        weights = np.array([self.weight_factors[factor] for factor in TECHNICAL_FACTORS], dtype=np.float32)
+        scores = _score_matrix(close, volume, weights)
+        
+        # Select top candidates by technical score without sorting all of them;
+        # NaN scores (e.g. zero-volume windows) are never selected
+        valid = np.flatnonzero(np.isfinite(scores))
+        top_count = min(50, len(valid))
+        top = valid[np.argpartition(-scores[valid], top_count - 1)[:top_count]] if top_count else valid
+        top = top[np.argsort(-scores[top], kind='stable')]
         
         logging.info(f"Technical screening: {len(symbols)} -> {top_count} stocks")
-        return results[:top_count]
+        return list(zip(np.asarray(valid_symbols)[top].tolist(), scores[top].tolist()))
     
-    def _analyze_single_stock(self, symbol: str) -> Optional[float]:
-        """Analyze single stock technical indicators"""
-        try:
-            from src.tools.api import get_price_history
-            
-            # Get price data
-            end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
+    async def _fetch_price_matrix(self, symbols: List[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Fetch close/volume history for all symbols and stack into 2-D arrays
+        
+        Fetches run on a dedicated pool of PRICE_FETCH_WORKERS threads; each
+        akshare request carries its own timeout, so queueing time is not counted.
+        Rows are trading days aligned on the most recent bar, columns are symbols.
+        Shorter histories are NaN-padded at the top.
+        """
+        end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
+        
+        def fetch(symbol: str) -> Dict[str, np.ndarray]:
+            bars = self._rolling_cache.get(symbol)
             
-            df = get_price_history(symbol, start_date, end_date)
-            if df is None or len(df) < 20:
-                return None
+            # Only request the bars after the last cached date
+            fetch_start = start_date
+            if len(bars['date']) and bars['date'][-1] >= start_date:
+                fetch_start = (datetime.strptime(bars['date'][-1], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
                 
-            # Calculate technical indicators
-            scores = {}
+            if fetch_start <= end_date:
+                df = self._fetch_history(symbol, fetch_start, end_date)
+                if not df.empty:
+                    bars = {
+                        'date': np.concatenate([bars['date'], df['date'].to_numpy(dtype='U10')]),
+                        'close': np.concatenate([bars['close'], df['close'].to_numpy(dtype=np.float32)]),
+                        'volume': np.concatenate([bars['volume'], df['volume'].to_numpy(dtype=np.float32)])
+                    }
             
-            # Momentum score
-            returns = df['close'].pct_change()
-            momentum_20d = returns.rolling(20).sum()
-            scores['momentum_score'] = min(max(momentum_20d.iloc[-1] * 5 + 0.5, 0), 1)
-            
-            # Trend score (MA analysis)
-            ma5 = df['close'].rolling(5).mean()
-            ma20 = df['close'].rolling(20).mean()
-            trend_strength = (ma5.iloc[-1] / ma20.iloc[-1] - 1) * 10 + 0.5
-            scores['trend_score'] = min(max(trend_strength, 0), 1)
-            
-            # Volume score
-            vol_ratio = df['volume'].iloc[-5:].mean() / df['volume'].iloc[-20:].mean()
-            scores['volume_score'] = min(max((vol_ratio - 0.5) * 2, 0), 1)
-            
-            # Volatility score (lower is better)
-            volatility = returns.std() * np.sqrt(252)
-            scores['volatility_score'] = max(0, 1 - volatility * 2)
-            
-            # Composite technical score
-            composite = sum(
-                scores[factor] * weight 
-                for factor, weight in self.weight_factors.items()
-            )
+            # Slide the window: drop bars older than the screening period
+            first = np.searchsorted(bars['date'], start_date)
+            return {key: values[first:] for key, values in bars.items()}
+        
+        series = {}
+        loop = asyncio.get_running_loop()
+        
+        async def fetch_single(executor: concurrent.futures.Executor, symbol: str):
+            try:
+                # akshare is synchronous, so each request runs on a pool thread
+                bars = await loop.run_in_executor(executor, fetch, symbol)
+            except Exception as e:
+                logging.warning(f"Price fetch failed for {symbol}: {e}")
+                return
+            self._rolling_cache.set(symbol, bars)
+            if len(bars['close']) >= 20:
+                series[symbol] = (bars['close'], bars['volume'])
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS,
+                                                   thread_name_prefix="price-fetch") as executor:
+            await asyncio.gather(*(fetch_single(executor, symbol) for symbol in symbols))
+        
+        self._rolling_cache.save()
+        
+        valid_symbols = [symbol for symbol in symbols if symbol in series]
+        length = max((len(series[s][0]) for s in valid_symbols), default=0)
+        
+        # float32 halves the working set; scores are clipped to [0, 1] anyway
+        close = np.full((length, len(valid_symbols)), np.nan, dtype=np.float32)
+        volume = np.full((length, len(valid_symbols)), np.nan, dtype=np.float32)
+        for j, symbol in enumerate(valid_symbols):
+            symbol_close, symbol_volume = series[symbol]
+            close[length - len(symbol_close):, j] = symbol_close
+            volume[length - len(symbol_volume):, j] = symbol_volume
             
-            return composite
+        return close, volume, valid_symbols
+    
+    def _fetch_history(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch raw daily back-adjusted (hfq) close/volume bars (dates as YYYY-MM-DD)
+        
+        Screening only needs close and volume, so this skips get_price_history and
+        the dozen rolling indicator columns (Hurst exponent, skew, ATR...) it computes.
+        hfq and qfq closes differ by one constant factor per symbol, so the
+        ratio-based technical scores are the same with either.
+        """
+        import akshare as ak
+        
+        df = ak.stock_zh_a_hist(
+            symbol=symbol,
+            period="daily",
+            start_date=start_date.replace('-', ''),
+            end_date=end_date.replace('-', ''),
+            adjust="hfq",
+            timeout=PRICE_FETCH_TIMEOUT
+        )
+        if df is None or df.empty:
+            return pd.DataFrame(columns=['date', 'close', 'volume'])
             
-        except Exception as e:
-            logging.warning(f"Technical analysis error for {symbol}: {e}")
-            return None
+        return pd.DataFrame({
+            'date': [str(d)[:10] for d in df['日期']],
+            'close': df['收盘'].astype(float),
+            'volume': df['成交量'].astype(float)
+        })
+
+class AsyncRateLimiter:
+    """Token bucket limiting how many requests may start per time period"""
+    
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = max_rate
+        self._last_refill = time.monotonic()
+        # Created lazily: the limiter may outlive the event loop it was first used on
+        self._lock = None
+        self._lock_loop = None
+        
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+        
+    async def acquire(self):
+        """Wait until a token is available, sleeping only when the rate is exceeded"""
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                refill = (now - self._last_refill) * self.max_rate / self.time_period
+                self._tokens = min(self.max_rate, self._tokens + refill)
+                self._last_refill = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                    
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
 
 class BatchAnalyzer:
     """Main batch analysis engine using existing agents"""
     
-    def __init__(self, config: ScreeningConfig):
+    def __init__(self, config: ScreeningConfig, code_to_name: Optional[Dict[str, str]] = None):
         self.config = config
+        if code_to_name is not None:
+            self.code_to_name = code_to_name  # Skips building the map from the snapshot
+        # Reused worker threads for the blocking run_hedge_fund pipeline
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=3, thread_name_prefix='hedge'
+        )
+        # Shared by every analysis run so back-to-back runs respect the same API rate
+        self._limiter = AsyncRateLimiter(max_rate=3, time_period=1.0)
+        
+    @functools.cached_property
+    def code_to_name(self) -> Dict[str, str]:
+        """Code -> name map, built from the shared spot snapshot on first use"""
+        try:
+            snapshot = get_spot_snapshot()
+            return dict(zip(snapshot['代码'], snapshot['名称']))
+        except Exception as e:
+            logging.warning(f"Error building stock name map: {e}")
+            return {}
         
     async def analyze_stocks(self, stock_candidates: List[Tuple[str, float]]) -> List[StockAnalysis]:
         """Run full multi-agent analysis on top candidates"""
+        return [analysis async for analysis in self.iter_analyses(stock_candidates)]
+    
+    async def iter_analyses(self, stock_candidates: List[Tuple[str, float]]) -> AsyncIterator[StockAnalysis]:
+        """Run full multi-agent analysis, yielding each result as soon as it completes"""
         
         # Import existing agents
         from src.main import run_hedge_fund
         
-        results = []
+        # Skip obviously uncompetitive candidates before the expensive LLM pipeline
+        if stock_candidates:
+            cutoff = np.quantile([tech_score for _, tech_score in stock_candidates],
+                                 self.config.full_analysis_score_quantile)
+            stock_candidates = [
+                (symbol, tech_score) for symbol, tech_score in stock_candidates
+                if tech_score >= cutoff
+            ]
+            logging.info(f"Full analysis cutoff {cutoff:.3f}: {len(stock_candidates)} candidates")
+            
         total_stocks = len(stock_candidates)
         
         # Use semaphore to limit concurrent API calls
         semaphore = asyncio.Semaphore(3)  # Max 3 concurrent analyses
+        loop = asyncio.get_running_loop()
+        
+        # Same date range for every stock in this run
+        end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
         
         async def analyze_single(symbol_score: Tuple[str, float]) -> Optional[StockAnalysis]:
             symbol, tech_score = symbol_score
-            async with semaphore:
+            # Respect API limits by request rate rather than a fixed per-task delay
+            async with semaphore, self._limiter:
                 try:
-                    # Add delay to respect API limits
-                    await asyncio.sleep(2)
-                    
                     # Run full analysis using existing system
-                    end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-                    start_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-                    
                     portfolio = {"cash": 100000, "stock": 0}
-                    decision_result = await asyncio.get_event_loop().run_in_executor(
-                        None,
+                    decision_result = await loop.run_in_executor(
+                        self._executor,
                         run_hedge_fund,
                         symbol,
                         start_date, 
@@ -239,55 +509,51 @@ class BatchAnalyzer:
                     logging.error(f"Analysis failed for {symbol}: {e}")
                     return None
         
-        # Run analyses concurrently
-        tasks = [analyze_single(candidate) for candidate in stock_candidates]
-        analysis_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filter successful results
-        for result in analysis_results:
-            if isinstance(result, StockAnalysis):
-                results.append(result)
-                
-        return results
+        # Run analyses concurrently and stream successful results in completion order
+        tasks = [asyncio.ensure_future(analyze_single(candidate)) for candidate in stock_candidates]
+        try:
+            for completed, next_result in enumerate(asyncio.as_completed(tasks), 1):
+                try:
+                    result = await next_result
+                except Exception as e:
+                    logging.error(f"Analysis task failed: {e}")
+                    continue
+                    
+                logging.info(f"Full analysis progress: {completed}/{total_stocks}")
+                if isinstance(result, StockAnalysis):
+                    yield result
+        finally:
+            # Consumer stopped early: don't leave analyses running in the background
+            for task in tasks:
+                task.cancel()
     
     def _parse_decision_result(self, symbol: str, decision_result: str, tech_score: float) -> StockAnalysis:
         """Parse decision result and create StockAnalysis object"""
         try:
             if isinstance(decision_result, str):
-                decision_result = decision_result.replace('```json', '').replace('```', '').strip()
-                decision = json.loads(decision_result)
+                decision = _json_loads(_FENCE_RE.sub('', decision_result).strip())
             else:
                 decision = decision_result
                 
             # Calculate composite score
-            agent_signals = {}
             weights = {'technical': 0.25, 'fundamental': 0.30, 'sentiment': 0.10, 'valuation': 0.35}
-            composite_score = 0
+            df_sig = pd.DataFrame(decision.get('agent_signals', []), columns=['agent', 'signal', 'confidence'])
+            df_sig['agent'] = df_sig['agent'].fillna('').astype(str).str.lower().str.extract(
+                f"({'|'.join(_AGENT_KEYS)})", expand=False
+            )
+            df_sig = df_sig.dropna(subset=['agent'])
             
-            for signal in decision.get('agent_signals', []):
-                agent_type = signal.get('agent', '').lower()
-                if 'technical' in agent_type:
-                    agent_type = 'technical'
-                elif 'fundamental' in agent_type:
-                    agent_type = 'fundamental'
-                elif 'sentiment' in agent_type:
-                    agent_type = 'sentiment'
-                elif 'valuation' in agent_type:
-                    agent_type = 'valuation'
-                else:
-                    continue
-                    
-                confidence = float(signal.get('confidence', 0))
-                if isinstance(confidence, str):
-                    confidence = float(confidence.replace('%', '')) / 100
-                    
-                agent_signals[agent_type] = {
-                    'signal': signal.get('signal', 'neutral'),
-                    'confidence': confidence
-                }
-                
-                if agent_type in weights:
-                    composite_score += confidence * weights[agent_type] * 100
+            # Confidence may be a fraction or a percentage string such as "75%"
+            raw_confidence = df_sig['confidence'].fillna(0).astype(str).str.strip()
+            is_percent = raw_confidence.str.endswith('%').to_numpy()
+            df_sig['confidence'] = pd.to_numeric(raw_confidence.str.rstrip('%'), errors='coerce').fillna(0) / np.where(is_percent, 100, 1)
+            df_sig['signal'] = df_sig['signal'].fillna('neutral')
+            
+            composite_score = float((df_sig['confidence'] * df_sig['agent'].map(weights)).sum() * 100)
+            agent_signals = {
+                agent_type: {'signal': signal, 'confidence': float(confidence)}
+                for agent_type, signal, confidence in zip(df_sig['agent'], df_sig['signal'], df_sig['confidence'])
+            }
             
             # Generate reasons based on signals
             key_reasons = self._generate_key_reasons(agent_signals, decision)
@@ -346,39 +612,44 @@ class BatchAnalyzer:
     
     def _get_stock_name(self, symbol: str) -> str:
         """Get stock name from symbol"""
-        try:
-            import akshare as ak
-            df = ak.stock_zh_a_spot_em()
-            stock_info = df[df['代码'] == symbol]
-            if not stock_info.empty:
-                return stock_info.iloc[0]['名称']
-        except:
-            pass
-        return f"Stock_{symbol}"
+        return self.code_to_name.get(symbol, f"Stock_{symbol}")
 
 class RankingEngine:
     """Rank and select top stocks"""
     
     def rank_stocks(self, analyses: List[StockAnalysis], target_count: int = 10) -> List[StockAnalysis]:
         """Rank stocks by composite score and return top picks"""
+        if not analyses:
+            return []
+            
+        # Structure-of-arrays view of the candidates
+        scores = np.array([analysis.composite_score for analysis in analyses], dtype=float)
+        valuation_bullish = np.array([
+            analysis.agent_signals.get('valuation', {}).get('signal') == 'bullish'
+            for analysis in analyses
+        ])
+        fundamental_bullish = np.array([
+            analysis.agent_signals.get('fundamental', {}).get('signal') == 'bullish'
+            for analysis in analyses
+        ])
         
-        # Sort by composite score
-        analyses.sort(key=lambda x: x.composite_score, reverse=True)
+        # Additional ranking factors for tie-breaking:
+        # boost bullish valuation signals (+2) and strong fundamentals (+1)
+        scores += 2 * valuation_bullish + 1 * fundamental_bullish
         
-        # Additional ranking factors for tie-breaking
-        for analysis in analyses:
-            # Boost score for bullish valuation signals
-            if analysis.agent_signals.get('valuation', {}).get('signal') == 'bullish':
-                analysis.composite_score += 2
-                
-            # Boost for strong fundamentals
-            if analysis.agent_signals.get('fundamental', {}).get('signal') == 'bullish':
-                analysis.composite_score += 1
+        # Select the top picks without sorting the whole candidate list
+        if target_count < len(scores):
+            top_idx = np.argpartition(-scores, target_count)[:target_count]
+        else:
+            top_idx = np.arange(len(scores))
+        top_idx = top_idx[np.argsort(-scores[top_idx], kind='stable')]
         
-        # Re-sort after adjustments
-        analyses.sort(key=lambda x: x.composite_score, reverse=True)
-        
-        return analyses[:target_count]
+        top_picks = []
+        for i in top_idx:
+            analyses[i].composite_score = float(scores[i])
+            top_picks.append(analyses[i])
+            
+        return top_picks
 
 class StockScreener:
     """Main screening orchestrator"""
@@ -399,17 +670,17 @@ class StockScreener:
         
         # Stage 1: Get stock universe
         print("🔍 获取股票池...")
-        all_stocks = self.universe.get_stock_list()
+        all_stocks, snapshot = self.universe.get_stock_list_with_snapshot()
         print(f"股票池总数: {len(all_stocks)}")
         
         # Stage 2: Quick filter
         print("⚡ 快速筛选中...")
-        filtered_stocks = self.quick_filter.filter_stocks(all_stocks)
+        filtered_stocks = self.quick_filter.filter_stocks(all_stocks, snapshot)
         print(f"快速筛选后: {len(filtered_stocks)} 只")
         
         # Stage 3: Technical screening
         print("📊 技术面筛选中...")
-        tech_candidates = self.technical_screener.screen_stocks(filtered_stocks)
+        tech_candidates = await self.technical_screener.screen_stocks_bulk(filtered_stocks)
         print(f"技术面筛选后: {len(tech_candidates)} 只")
         
         # Stage 4: Full analysis
@@ -3,28 +3,111 @@
 
 import io
 import base64
-from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
+import importlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from datetime import datetime, timedelta
+import numpy as np
+import streamlit as st
+
+# plotly is heavy to import, so chart builders import it on first use
+_LAZY_MODULES = {'go': 'plotly.graph_objects', 'px': 'plotly.express'}
+
+def __getattr__(name):
+    """Resolve the plotly aliases lazily for attribute access from other modules"""
+    if name in _LAZY_MODULES:
+        return importlib.import_module(_LAZY_MODULES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional, fall back to the stdlib parser
+    _json_loads = json.loads
+
+# Report translation tables
+_AGENT_NAMES = MappingProxyType({
+    'Technical Analysis': '技术分析',
+    'Fundamental Analysis': '基本面分析',
+    'Sentiment Analysis': '情绪分析',
+    'Valuation Analysis': '估值分析',
+    'Risk Management': '风险管理'
+})
+_ACTION_TEXT = MappingProxyType({"buy": "买入", "sell": "卖出", "hold": "持有"})
+_SIGNAL_TEXT = MappingProxyType({"bullish": "看涨", "bearish": "看跌", "neutral": "中性"})
+_SENTIMENT_TEXT = ("消极", "中性", "积极")  # score < -0.3, within [-0.3, 0.3], > 0.3
+
+# Risk radar axes, in the order the risk factor vector is built
+_RISK_LABELS = ('盈利能力', '财务稳定', '流动性', '成长性', '估值合理性')
+
+# Comparison chart line colors
+_COLORS = ('blue', 'red', 'green', 'orange', 'purple')
+
+# Max points per line sent to the browser for comparison charts
+COMPARISON_MAX_POINTS = 1000
+
+def lttb_indices(y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling, returns indices of kept points"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    x = np.arange(n, dtype=float)
+    every = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Keep the point forming the largest triangle with the previous pick and next bucket mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def _frame_fingerprint(data):
+    """Cheap cache key for a price frame: length, date span and last close"""
+    if data is None or data.empty:
+        return (0,)
+    return (len(data), str(data['date'].iat[0]), str(data['date'].iat[-1]), float(data['close'].iat[-1]))
 
 def create_comparison_chart(symbols_data):
     """Create comparison chart for multiple stocks"""
-    fig = go.Figure()
+    fingerprint = tuple((symbol, _frame_fingerprint(data)) for symbol, data in symbols_data.items())
+    return _build_comparison_chart(fingerprint, symbols_data)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_comparison_chart(fingerprint, _symbols_data):
+    """Build the comparison figure; cached on the fingerprint, the frames themselves are not hashed"""
+    import plotly.graph_objects as go
+    symbols_data = _symbols_data
     
-    colors = ['blue', 'red', 'green', 'orange', 'purple']
+    fig = go.Figure()
     
     for i, (symbol, data) in enumerate(symbols_data.items()):
-        if data is not None and not data.empty:
-            # Normalize prices to percentage change from first day
-            normalized_prices = (data['close'] / data['close'].iloc[0] - 1) * 100
-            
-            fig.add_trace(go.Scatter(
-                x=data['date'],
-                y=normalized_prices,
-                mode='lines',
-                name=symbol,
-                line=dict(color=colors[i % len(colors)])
-            ))
+        if data is None:
+            continue
+        close = np.array(data['close'], dtype=np.float32)  # copy, normalized in place below
+        if close.size == 0:
+            continue
+        # Normalize prices to percentage change from first day, in place
+        close *= np.float32(100.0) / close[0]
+        close -= np.float32(100.0)
+        keep = lttb_indices(close, COMPARISON_MAX_POINTS)
+        
+        fig.add_trace(go.Scattergl(
+            x=data['date'].to_numpy()[keep],
+            y=close[keep],
+            mode='lines',
+            name=symbol,
+            line=dict(color=_COLORS[i % len(_COLORS)])
+        ))
     
     fig.update_layout(
         title="股票价格对比 (相对涨跌幅 %)",
@@ -39,7 +122,7 @@ def create_comparison_chart(symbols_data):
 def export_analysis_report(symbol, decision_result, financial_metrics, news_summary, sentiment_score):
     """Generate downloadable analysis report"""
     
-    report_content = f"""
+    parts = [f"""
 # AI投资分析报告
 
 ## 股票信息
@@ -47,59 +130,48 @@ def export_analysis_report(symbol, decision_result, financial_metrics, news_summ
 - **分析时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 ## 投资决策
-"""
+"""]
     
     try:
-        if isinstance(decision_result, str):
-            decision = json.loads(decision_result)
-        else:
-            decision = decision_result
+        decision = _json_loads(decision_result) if isinstance(decision_result, (bytes, str)) else decision_result
             
         action = decision.get('action', 'hold')
         quantity = decision.get('quantity', 0)
         confidence = decision.get('confidence', 0)
         
-        action_text = "买入" if action == "buy" else "卖出" if action == "sell" else "持有"
+        action_text = _ACTION_TEXT.get(action, "持有")
         
-        report_content += f"""
+        parts.append(f"""
 - **推荐操作**: {action_text}
 - **建议数量**: {quantity:,} 股
 - **置信度**: {confidence*100:.1f}%
 
 ### 各模块信号
-"""
+""")
         
         for signal in decision.get('agent_signals', []):
             agent_name = signal.get('agent', 'Unknown')
             agent_signal = signal.get('signal', 'neutral')
             agent_confidence = signal.get('confidence', 0)
             
-            agent_display_names = {
-                'Technical Analysis': '技术分析',
-                'Fundamental Analysis': '基本面分析',
-                'Sentiment Analysis': '情绪分析',
-                'Valuation Analysis': '估值分析',
-                'Risk Management': '风险管理'
-            }
-            
-            display_name = agent_display_names.get(agent_name, agent_name)
-            signal_text = "看涨" if agent_signal == "bullish" else "看跌" if agent_signal == "bearish" else "中性"
+            display_name = _AGENT_NAMES.get(agent_name, agent_name)
+            signal_text = _SIGNAL_TEXT.get(agent_signal, "中性")
             confidence_str = f"{agent_confidence*100:.0f}%" if isinstance(agent_confidence, (int, float)) else str(agent_confidence)
             
-            report_content += f"- **{display_name}**: {signal_text} ({confidence_str})\n"
+            parts.append(f"- **{display_name}**: {signal_text} ({confidence_str})\n")
         
-        report_content += f"""
+        parts.append(f"""
 
 ### 决策理由
 {decision.get('reasoning', '无详细说明')}
 
 ## 财务分析
-"""
+""")
         
         if financial_metrics and financial_metrics[0]:
             metrics = financial_metrics[0]
             
-            report_content += f"""
+            parts.append(f"""
 ### 盈利能力指标
 - **净资产收益率**: {metrics.get('return_on_equity', 0)*100:.2f}%
 - **净利率**: {metrics.get('net_margin', 0)*100:.2f}%
@@ -117,36 +189,36 @@ def export_analysis_report(symbol, decision_result, financial_metrics, news_summ
 - **市盈率**: {metrics.get('pe_ratio', 0):.2f}
 - **市净率**: {metrics.get('price_to_book', 0):.2f}
 - **市销率**: {metrics.get('price_to_sales', 0):.2f}
-"""
+""")
 
-        report_content += f"""
+        parts.append(f"""
 
 ## 情绪分析
 - **情绪分数**: {sentiment_score:.2f} (范围: -1 到 +1)
-- **情绪评价**: {"积极" if sentiment_score > 0.3 else "消极" if sentiment_score < -0.3 else "中性"}
+- **情绪评价**: {_SENTIMENT_TEXT[(sentiment_score >= -0.3) + (sentiment_score > 0.3)]}
 
 ## 新闻摘要
-"""
+""")
         
         for i, news in enumerate(news_summary[:3], 1):
-            report_content += f"""
+            parts.append(f"""
 ### 新闻 {i}
 - **标题**: {news.get('title', 'N/A')}
 - **来源**: {news.get('source', 'N/A')}
 - **时间**: {news.get('publish_time', 'N/A')}
 - **内容**: {news.get('content', 'N/A')[:200]}...
 
-"""
+""")
 
-        report_content += """
+        parts.append("""
 ---
 **免责声明**: 本报告仅供参考，不构成投资建议。投资有风险，请谨慎决策。
-"""
+""")
         
     except Exception as e:
-        report_content += f"\n错误: 生成报告时出现问题 - {str(e)}"
+        parts.append(f"\n错误: 生成报告时出现问题 - {str(e)}")
     
-    return report_content
+    return "".join(parts)
 
 def create_download_link(content, filename, link_text):
     """Create download link for content"""
@@ -161,29 +233,28 @@ def display_advanced_metrics(df):
     
     st.subheader("📈 高级技术指标")
     
+    close = df['close'].to_numpy(dtype=float)
+    returns = np.diff(close) / close[:-1]
+    volatility = returns.std(ddof=1) * np.sqrt(252) * 100
+    price_change = (close[-1] / close[0] - 1) * 100
+    # Running peak, then close / peak written back into the same buffer
+    drawdown = np.fmax.accumulate(close)
+    np.divide(close, drawdown, out=drawdown)
+    max_drawdown = (np.nanmin(drawdown) - 1) * 100
+    avg_volume = df['volume'].to_numpy(dtype=float).mean() / 100  # Convert to lots
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        # Volatility
-        returns = df['close'].pct_change().dropna()
-        volatility = returns.std() * np.sqrt(252) * 100
         st.metric("年化波动率", f"{volatility:.2f}%")
     
     with col2:
-        # Price change
-        price_change = (df['close'].iloc[-1] / df['close'].iloc[0] - 1) * 100
         st.metric("期间涨跌幅", f"{price_change:.2f}%")
     
     with col3:
-        # Max drawdown
-        rolling_max = df['close'].expanding().max()
-        drawdown = (df['close'] / rolling_max - 1) * 100
-        max_drawdown = drawdown.min()
         st.metric("最大回撤", f"{max_drawdown:.2f}%")
     
     with col4:
-        # Average volume
-        avg_volume = df['volume'].mean() / 100  # Convert to lots
         st.metric("平均成交量", f"{avg_volume:.0f}手")
 
 def create_risk_assessment_chart(financial_metrics):
@@ -191,25 +262,29 @@ def create_risk_assessment_chart(financial_metrics):
     if not financial_metrics or not financial_metrics[0]:
         return None
     
-    metrics = financial_metrics[0]
-    
-    # Risk factors (higher score = lower risk)
-    risk_factors = {
-        '盈利能力': min(metrics.get('return_on_equity', 0) * 5, 1),
-        '财务稳定': min(1 - metrics.get('debt_to_equity', 1), 1),
-        '流动性': min(metrics.get('current_ratio', 0) / 2, 1),
-        '成长性': min(metrics.get('revenue_growth', 0) * 2, 1),
-        '估值合理性': min(1 / max(metrics.get('pe_ratio', 30) / 20, 0.1), 1)
-    }
-    
-    # Ensure all values are between 0 and 1
-    risk_factors = {k: max(0, min(1, v)) for k, v in risk_factors.items()}
+    return _build_risk_assessment_chart(tuple(sorted(financial_metrics[0].items())))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_risk_assessment_chart(metrics_items):
+    """Build the risk radar figure from hashable (name, value) metric pairs"""
+    metrics = dict(metrics_items)
+    
+    # Risk factors (higher score = lower risk), clamped to [0, 1]
+    risk_values = np.clip(np.array([
+        metrics.get('return_on_equity', 0) * 5,
+        1 - metrics.get('debt_to_equity', 1),
+        metrics.get('current_ratio', 0) / 2,
+        metrics.get('revenue_growth', 0) * 2,
+        1 / max(metrics.get('pe_ratio', 30) / 20, 0.1)
+    ], dtype=float), 0.0, 1.0)
+    
+    import plotly.graph_objects as go
     
     fig = go.Figure()
     
     fig.add_trace(go.Scatterpolar(
-        r=list(risk_factors.values()),
-        theta=list(risk_factors.keys()),
+        r=risk_values.tolist(),
+        theta=list(_RISK_LABELS),
         fill='toself',
         name='风险评估',
         line_color='rgb(0,100,200)'
@@ -228,6 +303,70 @@ def create_risk_assessment_chart(financial_metrics):
     
     return fig
 
+# Network, parsing and missing-column errors from the price source; anything else is a bug
+_COMPARISON_ERRORS = (OSError, KeyError, ValueError)
+
+def _load_comparison_data(symbol, days, as_of):
+    """Load date/close bars for the days before as_of (no Streamlit calls, safe on worker threads)"""
+    from src.tools.api import get_price_history
+    
+    end_date = as_of - timedelta(days=1)
+    start_date = end_date - timedelta(days=days)
+    data = get_price_history(symbol, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+    if data is None or data.empty:
+        return None
+    return data[['date', 'close']].reset_index(drop=True)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_comparison_data(symbol, days, as_of, _load=None):
+    """Comparison bars per symbol and day; failures raise and are not cached"""
+    return _load() if _load else _load_comparison_data(symbol, days, as_of)
+
+class _CacheMiss(Exception):
+    """Raised by the _load probe to read a st.cache_data entry without computing it"""
+
+def _raise_cache_miss():
+    raise _CacheMiss
+
+def _load_or_none(symbol, days, as_of):
+    """_load_comparison_data for the worker pool; data errors become None"""
+    try:
+        return _load_comparison_data(symbol, days, as_of)
+    except _COMPARISON_ERRORS:
+        return None
+
+def fetch_comparison_batch(symbols, days=90):
+    """Fetch comparison data for several symbols, loading cache misses concurrently
+    
+    The cache is read and filled on the script thread; the pool only runs the
+    plain loader, since st.cache_data needs the script run context.
+    """
+    as_of = datetime.now().date()
+    results, missing = {}, []
+    for symbol in symbols:
+        try:
+            results[symbol] = _cached_comparison_data(symbol, days, as_of, _load=_raise_cache_miss)
+        except _CacheMiss:
+            missing.append(symbol)
+    
+    if missing:
+        # Network bound, so one thread per symbol up to 8
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as executor:
+            loaded = list(executor.map(lambda symbol: _load_or_none(symbol, days, as_of), missing))
+        for symbol, data in zip(missing, loaded):
+            if data is not None:
+                _cached_comparison_data(symbol, days, as_of, _load=lambda data=data: data)
+            results[symbol] = data
+    
+    return {symbol: results[symbol] for symbol in symbols}
+
+def fetch_comparison_data(symbol, days=90):
+    """Fetch comparison data with caching (None when unavailable)"""
+    try:
+        return _cached_comparison_data(symbol, days, datetime.now().date())
+    except _COMPARISON_ERRORS:
+        return None
+
 def display_stock_comparison():
     """Display stock comparison feature"""
     st.subheader("📊 股票对比分析")
@@ -240,12 +379,12 @@ def display_stock_comparison():
         
         if compare_symbols and st.button("生成对比图"):
             symbols = [s.strip() for s in compare_symbols.split(',')]
+            valid = [symbol for symbol in dict.fromkeys(symbols) if symbol.isdigit() and len(symbol) == 6]
             symbols_data = {}
             
-            for symbol in symbols:
-                if symbol.isdigit() and len(symbol) == 6:
-                    data = fetch_stock_data(symbol, 90)  # 3 months data
-                    symbols_data[symbol] = data
+            if valid:
+                # 3 months of data per symbol
+                symbols_data = fetch_comparison_batch(valid, 90)
             
             if symbols_data:
                 fig = create_comparison_chart(symbols_data)
@@ -259,11 +398,13 @@ def add_sidebar_features():
     st.sidebar.subheader("📊 高级功能")
     
     # Export options
-    if st.sidebar.checkbox("启用数据导出"):
+    export_enabled = st.sidebar.checkbox("启用数据导出")
+    if export_enabled:
         st.sidebar.info("分析完成后可下载报告")
     
     # Comparison mode
-    if st.sidebar.checkbox("启用股票对比"):
+    comparison_enabled = st.sidebar.checkbox("启用股票对比")
+    if comparison_enabled:
         st.sidebar.info("将显示股票对比功能")
     
     # Alert settings
@@ -279,13 +420,27 @@ def add_sidebar_features():
     show_advanced_metrics = st.sidebar.checkbox("显示高级指标", value=True)
     
     return {
-        'export_enabled': st.sidebar.checkbox("启用数据导出"),
-        'comparison_enabled': st.sidebar.checkbox("启用股票对比"),
+        'export_enabled': export_enabled,
+        'comparison_enabled': comparison_enabled,
         'price_alert': price_alert,
         'chart_theme': chart_theme,
         'show_advanced_metrics': show_advanced_metrics
     }
 
+def lazy_section(label, state_key):
+    """Render an open/close toggle for a section; returns True while the section is open
+    
+    Hidden sections skip building their charts on every rerun.
+    """
+    st.session_state.setdefault(state_key, False)
+    
+    def toggle():
+        st.session_state[state_key] = not st.session_state[state_key]
+    
+    arrow = "▼" if st.session_state[state_key] else "▶"
+    st.button(f"{arrow} {label}", key=f"{state_key}_toggle", on_click=toggle)
+    return st.session_state[state_key]
+
 # Integration example for the main interface
 def enhanced_main_interface_example():
     """Example of how to integrate enhanced features"""
@@ -297,18 +452,20 @@ def enhanced_main_interface_example():
     
     # In the results display section, add:
     
-    # Advanced metrics (if enabled)
-    if sidebar_options['show_advanced_metrics']:
-        display_advanced_metrics(df)
+    # Advanced metrics (if enabled), only computed once the section is opened
+    if sidebar_options['show_advanced_metrics'] and lazy_section("高级技术指标", "advanced_metrics_open"):
+        with st.expander("高级技术指标", expanded=True):
+            display_advanced_metrics(df)
     
     # Risk assessment chart
-    if financial_metrics:
-        risk_fig = create_risk_assessment_chart(financial_metrics)
-        if risk_fig:
-            st.plotly_chart(risk_fig, use_container_width=True)
+    if financial_metrics and lazy_section("风险评估", "risk_open"):
+        with st.expander("风险评估", expanded=True):
+            risk_fig = create_risk_assessment_chart(financial_metrics)
+            if risk_fig:
+                st.plotly_chart(risk_fig, use_container_width=True)
     
     # Stock comparison (if enabled)
-    if sidebar_options['comparison_enabled']:
+    if sidebar_options['comparison_enabled'] and lazy_section("股票对比", "comparison_open"):
         display_stock_comparison()
     
     # Export functionality (if enabled)
@@ -325,7 +482,7 @@ def enhanced_main_interface_example():
         with col1:
             st.download_button(
                 label="📄 下载分析报告",
-                data=report_content,
+                data=report_content.encode(),
                 file_name=filename,
                 mime="text/markdown"
             )
@@ -333,7 +490,10 @@ def enhanced_main_interface_example():
         with col2:
             # CSV export option
             if not df.empty:
-                csv_data = df.to_csv(index=False)
+                # Write encoded CSV straight into a byte buffer, no intermediate str
+                csv_buffer = io.BytesIO()
+                df.to_csv(csv_buffer, index=False, encoding='utf-8')
+                csv_data = csv_buffer.getvalue()
                 csv_filename = f"股票数据_{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                 st.download_button(
                     label="📊 下载价格数据",
@@ -1,14 +1,38 @@
 import os
+import json
 import time
+import atexit
+import email.utils
+import asyncio
 import logging
+import queue
+import random
+import ssl
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, TimedRotatingFileHandler
+import functools
+import itertools
+import importlib.util
+import threading
+import weakref
 from dotenv import load_dotenv
 from dataclasses import dataclass
-import backoff
-from openai import OpenAI
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+try:
+    import orjson
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson 为可选依赖，缺失时使用标准库
+    def _json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False)
 
 # 初始化日志记录器
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+# 生产环境可设置 API_LOG_LEVEL=WARNING，跳过请求/响应内容的格式化
+logger.setLevel(os.getenv("API_LOG_LEVEL", "DEBUG").upper())
 logger.handlers.clear()  # 清除所有现有处理器
 
 # 创建日志目录
@@ -16,54 +40,109 @@ log_dir = os.path.join(os.path.dirname(os.path.dirname(
     os.path.dirname(os.path.abspath(__file__)))), 'logs')
 os.makedirs(log_dir, exist_ok=True)
 
-# 设置文件处理器
-log_file = os.path.join(log_dir, f'api_calls_{time.strftime("%Y%m%d")}.log')
-logger.debug(f"Creating log file at: {log_file}")
+# 设置文件处理器（每天午夜切换到新文件，旧文件加日期后缀，保留 30 天）
+log_file = os.path.join(log_dir, 'api_calls.log')
+logger.debug("Creating log file at: %s", log_file)
+
+LOG_FILE_BUFFER_SIZE = 64 * 1024  # 日志文件写缓冲（字节）
+
+
+class _BufferedFileHandler(TimedRotatingFileHandler):
+    """带大写缓冲的文件处理器：逐条记录不刷新，遇到 ERROR、定时器触发或关闭时才写盘"""
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, encoding=self.encoding,
+                    errors=self.errors, buffering=LOG_FILE_BUFFER_SIZE)
+
+    def flush(self):
+        # StreamHandler.emit 每条记录后都会调用 flush，这里跳过以合并写入
+        pass
+
+    def flush_buffer(self):
+        super().flush()
+
+    def emit(self, record):
+        super().emit(record)
+        if record.levelno >= logging.ERROR:
+            self.flush_buffer()
+
 
 try:
-    file_handler = logging.FileHandler(log_file, encoding='utf-8', mode='a')
+    # delay=True: 首次写入时才打开文件
+    file_handler = _BufferedFileHandler(
+        log_file, when='midnight', backupCount=30, encoding='utf-8', delay=True)
     file_handler.setLevel(logging.DEBUG)
-    logger.debug("Successfully created file handler")
 except Exception as e:
-    logger.error(f"Error creating file handler: {str(e)}")
+    file_handler = None
+    logger.error("Error creating file handler: %s", e)
 
-# 设置控制台处理器
+# 设置控制台处理器：DEBUG_LOGGING=true 时输出全部日志，否则只输出警告和错误
+debug_logging = os.getenv("DEBUG_LOGGING", "").lower() in ("1", "true", "yes")
 console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
+console_handler.setLevel(logging.DEBUG if debug_logging else logging.WARNING)
 
 # 设置日志格式
 formatter = logging.Formatter(
     '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
 console_handler.setFormatter(formatter)
+output_handlers = [console_handler]
 
-# 添加处理器
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+LOG_FLUSH_INTERVAL = 30  # 文件日志定时刷新间隔（秒）
+_log_flush_stop = threading.Event()
 
-# 立即测试日志记录
-logger.debug("Logger initialization completed")
-logger.info("API logging system started")
 
-# 状态图标
-SUCCESS_ICON = "✓"
-ERROR_ICON = "✗"
-WAIT_ICON = "⟳"
+def _flush_periodically(memory_handler, target):
+    """后台定时刷新缓冲的文件日志，避免低流量时记录长时间滞留内存"""
+    while not _log_flush_stop.wait(LOG_FLUSH_INTERVAL):
+        memory_handler.flush()
+        target.flush_buffer()
+
+
+# 文件日志先缓存在内存中，攒满、遇到 ERROR 或定时器触发时批量写入，退出时刷新剩余记录
+if file_handler is not None:
+    file_handler.setFormatter(formatter)
+    buffered_file_handler = MemoryHandler(
+        capacity=512, flushLevel=logging.ERROR, target=file_handler, flushOnClose=True)
+    output_handlers.append(buffered_file_handler)
+    threading.Thread(target=_flush_periodically, args=(buffered_file_handler, file_handler),
+                     name="api-log-flush", daemon=True).start()
+
 
+class _DeferredQueueHandler(QueueHandler):
+    """原样入队日志记录，不在调用线程预先格式化"""
 
-@dataclass
-class ChatMessage:
-    content: str
+    def prepare(self, record):
+        return record
 
 
-@dataclass
-class ChatChoice:
-    message: ChatMessage
+# 调用线程只把日志记录放入队列，由后台线程用共享的 formatter 格式化一次并写出
+log_queue = queue.Queue(-1)
+queue_handler = _DeferredQueueHandler(log_queue)
+queue_handler.setFormatter(None)
+logger.addHandler(queue_handler)
+log_listener = QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+log_listener.start()
 
 
-@dataclass
-class ChatCompletion:
-    choices: list[ChatChoice]
+def _flush_logs():
+    """排空日志队列、停止后台线程并把内存和文件缓冲写盘（进程退出时调用，可重复调用）
+
+    未捕获异常退出时 atexit 同样会执行，因此不需要替换 sys.excepthook。
+    """
+    _log_flush_stop.set()
+    if log_listener._thread is not None:
+        log_listener.stop()
+    if file_handler is not None:
+        buffered_file_handler.flush()
+        file_handler.flush_buffer()
+
+
+atexit.register(_flush_logs)
+
+# 状态图标
+SUCCESS_ICON = "✓"
+ERROR_ICON = "✗"
+WAIT_ICON = "⟳"
 
 
 # 获取项目根目录
@@ -74,9 +153,9 @@ env_path = os.path.join(project_root, '.env')
 # 加载环境变量
 if os.path.exists(env_path):
     load_dotenv(env_path, override=True)
-    logger.info(f"{SUCCESS_ICON} 已加载环境变量: {env_path}")
+    logger.info("%s 已加载环境变量: %s", SUCCESS_ICON, env_path)
 else:
-    logger.warning(f"{ERROR_ICON} 未找到环境变量文件: {env_path}")
+    logger.warning("%s 未找到环境变量文件: %s", ERROR_ICON, env_path)
 
 # 获取API配置 - 支持多种API提供商
 api_key = os.getenv("API_KEY")
@@ -101,104 +180,285 @@ if not model_name:
     logger.error("未找到 MODEL_NAME 环境变量")
     raise ValueError("MODEL_NAME not found in environment variables. Please set MODEL_NAME in your .env file")
 
-logger.info(f"{SUCCESS_ICON} API配置:")
-logger.info(f"  提供商: {api_provider}")
-logger.info(f"  基础URL: {api_base_url}")
-logger.info(f"  模型: {model_name}")
+logger.info("%s API配置:", SUCCESS_ICON)
+logger.info("  提供商: %s", api_provider)
+logger.info("  基础URL: %s", api_base_url)
+logger.info("  模型: %s", model_name)
+
+# 所有客户端共用一个 SSL 上下文和 HTTP 连接池，避免每次构造客户端都重新加载证书
+_shared_ssl = ssl.create_default_context()
+# 安装了 h2 时启用 HTTP/2 多路复用
+_http2_enabled = importlib.util.find_spec("h2") is not None
+# 长连接保持 60 秒，重试时复用已建立的 TLS 连接；重试由 _with_retry 负责，传输层不重试
+_http_limits = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0)
+_shared_transport = httpx.HTTPTransport(
+    verify=_shared_ssl,
+    http2=_http2_enabled,
+    retries=0,
+    limits=_http_limits
+)
+# 长回答的生成可能需要数分钟，读超时默认与 openai 客户端的 600 秒一致，可用 API_READ_TIMEOUT 调整
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "600"))
+_http_timeout = httpx.Timeout(connect=5.0, read=API_READ_TIMEOUT, write=10.0, pool=5.0)
+_shared_http = httpx.Client(transport=_shared_transport, timeout=_http_timeout)
+atexit.register(_shared_http.close)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_client(base_url, key):
+    """按 (base_url, api_key) 缓存客户端，切换提供商时复用已有连接池"""
+    return OpenAI(api_key=key, base_url=base_url, http_client=_shared_http, max_retries=0)
+
 
 # 初始化 OpenAI 客户端（支持任何OpenAI兼容的API）
+# 异步客户端的连接池绑定事件循环，因此按事件循环分别缓存
+_async_clients = weakref.WeakKeyDictionary()
+_async_closers = weakref.WeakKeyDictionary()  # 事件循环 -> 关闭其客户端的异步生成器
+
+
+async def _close_on_loop_shutdown(clients):
+    """挂起直到事件循环关闭：asyncio.run 会在 shutdown_asyncgens 时 aclose 本生成器，进而关闭客户端"""
+    try:
+        yield
+    finally:
+        for async_client in clients.values():
+            await async_client.close()
+
+
+def _get_async_client(base_url, key):
+    """获取当前事件循环下 (base_url, api_key) 对应的异步客户端（与同步客户端相同的连接池限制和超时）"""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        clients = _async_clients[loop] = {}
+        # 启动生成器，使其登记到事件循环的异步生成器列表中（循环只弱引用它，强引用保存在 _async_closers）
+        closer = _async_closers[loop] = _close_on_loop_shutdown(clients)
+        asyncio.ensure_future(closer.asend(None))
+    clients = _async_clients[loop]
+    if (base_url, key) not in clients:
+        clients[(base_url, key)] = AsyncOpenAI(
+            api_key=key, base_url=base_url, max_retries=0,
+            http_client=httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    verify=_shared_ssl, http2=_http2_enabled, retries=0, limits=_http_limits),
+                timeout=_http_timeout))
+    return clients[(base_url, key)]
+
+
+_active_endpoint = (api_base_url, api_key)  # 当前使用的 (base_url, api_key)
 try:
-    client = OpenAI(
-        api_key=api_key,
-        base_url=api_base_url
-    )
-    logger.info(f"{SUCCESS_ICON} OpenAI兼容客户端初始化成功")
+    client = _get_client(*_active_endpoint)
+    logger.info("%s OpenAI兼容客户端初始化成功", SUCCESS_ICON)
 except Exception as e:
-    logger.error(f"{ERROR_ICON} 客户端初始化失败: {str(e)}")
+    logger.error("%s 客户端初始化失败: %s", ERROR_ICON, e)
     raise
 
 
+# 可恢复的错误：限流、服务端 5xx、超时、网络错误（APITimeoutError 是 APIConnectionError 的子类）
+_RECOVERABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+# 其他可重试的 HTTP 状态码：请求超时、冲突
+_RETRYABLE_STATUS_CODES = frozenset({408, 409})
+
+# 退避参数：等待时间在 [RETRY_BASE_DELAY, RETRY_BASE_DELAY * 2^(attempt+1)] 内随机，且不超过 RETRY_MAX_DELAY；
+# 服务端要求的 Retry-After 超过 RETRY_MAX_DELAY 时不再重试
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+
+def _is_retryable(e):
+    """判断异常是否属于可重试的临时错误（其余错误直接抛出）"""
+    if isinstance(e, _RECOVERABLE_ERRORS):
+        return True
+    if isinstance(e, openai.APIStatusError) and e.status_code in _RETRYABLE_STATUS_CODES:
+        return True
+    # DeepSeek 的 AFC 限制没有专门的异常类型，只能按错误信息判断
+    return "afc is enabled" in str(e).lower()
+
+
+def _retry_after_seconds(e):
+    """读取服务端返回的 Retry-After（秒数或 HTTP 日期），没有则返回 None"""
+    response = getattr(e, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 # 根据不同API提供商配置重试策略
 def get_retry_config():
     """根据API提供商返回相应的重试配置"""
     if api_provider.lower() == "deepseek":
         return {
             "max_tries": 5,
-            "max_time": 300,
-            "giveup": lambda e: "AFC is enabled" not in str(e)
-        }
-    elif api_provider.lower() == "openai":
-        return {
-            "max_tries": 3,
-            "max_time": 120,
-            "giveup": lambda e: "rate_limit_exceeded" not in str(e).lower()
-        }
-    elif api_provider.lower() == "anthropic":
-        return {
-            "max_tries": 3,
-            "max_time": 120,
-            "giveup": lambda e: "rate_limit" not in str(e).lower()
+            "max_time": 300
         }
     else:
-        # 通用配置
         return {
             "max_tries": 3,
-            "max_time": 120,
-            "giveup": lambda e: False  # 总是重试
+            "max_time": 120
         }
 
 
-@backoff.on_exception(
-    backoff.expo,
-    (Exception),
-    **get_retry_config()
-)
+def _next_retry_delay(attempt, error, started, config):
+    """计算下一次重试前的等待时间；不应再重试时返回 None"""
+    if attempt + 1 >= config["max_tries"]:
+        return None
+    delay = _retry_after_seconds(error) if error is not None else None
+    if delay is None:
+        delay = min(random.uniform(RETRY_BASE_DELAY, RETRY_BASE_DELAY * 2 ** (attempt + 1)), RETRY_MAX_DELAY)
+    elif delay > RETRY_MAX_DELAY:
+        # 不能提前于服务端要求的时间重试，等待太久则直接放弃
+        logger.warning("%s 服务端要求 %.1f 秒后重试，超过上限 %.1f 秒，不再重试", ERROR_ICON, delay, RETRY_MAX_DELAY)
+        return None
+    if time.monotonic() - started + delay > config["max_time"]:
+        return None
+    return delay
+
+
+def _with_retry(func):
+    """唯一的重试层：可恢复的异常和空响应会重试（同步和异步函数均适用）
+
+    优先遵循服务端的 Retry-After，否则使用带抖动的指数退避；
+    重试次数和总时长按调用时的提供商配置确定。
+    """
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            config, started = get_retry_config(), time.monotonic()
+            for attempt in itertools.count():
+                error = None
+                try:
+                    response = await func(*args, **kwargs)
+                    if response is not None:
+                        return response
+                except Exception as e:
+                    # 每个异常只判断一次是否可重试，并且只记录一次
+                    if not _is_retryable(e):
+                        logger.error("%s API 调用失败: %s", ERROR_ICON, e)
+                        raise
+                    logger.warning("%s API限制或网络错误，等待重试... 错误: %s", ERROR_ICON, e)
+                    error = e
+                delay = _next_retry_delay(attempt, error, started, config)
+                if delay is None:
+                    if error is not None:
+                        raise error
+                    return None
+                logger.info("%s 等待 %.1f 秒后重试...", WAIT_ICON, delay)
+                await asyncio.sleep(delay)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        config, started = get_retry_config(), time.monotonic()
+        for attempt in itertools.count():
+            error = None
+            try:
+                response = func(*args, **kwargs)
+                if response is not None:
+                    return response
+            except Exception as e:
+                # 每个异常只判断一次是否可重试，并且只记录一次
+                if not _is_retryable(e):
+                    logger.error("%s API 调用失败: %s", ERROR_ICON, e)
+                    raise
+                logger.warning("%s API限制或网络错误，等待重试... 错误: %s", ERROR_ICON, e)
+                error = e
+            delay = _next_retry_delay(attempt, error, started, config)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return None
+            logger.info("%s 等待 %.1f 秒后重试...", WAIT_ICON, delay)
+            time.sleep(delay)
+    return wrapper
+
+
+# 请求/响应内容在日志中最多保留的字符数，避免每次调用写入数十 KB 的提示词
+_MAX_LOG_CHARS = 1024
+
+
+def _truncate_for_log(text):
+    if text is None or len(text) <= _MAX_LOG_CHARS:
+        return text
+    return f"{text[:_MAX_LOG_CHARS]}...[截断，共 {len(text)} 字符]"
+
+
+def _build_request(model, messages, config):
+    """记录请求日志并构建请求参数"""
+    logger.info("%s 正在调用 %s API...", WAIT_ICON, api_provider)
+    logger.info("模型: %s", model)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("请求内容: %s", _truncate_for_log(_json_dumps(messages)))
+        logger.debug("请求配置: %s", _truncate_for_log(repr(config)))
+
+    request_params = {
+        "model": model,
+        "messages": messages
+    }
+    # 添加额外配置
+    if config:
+        request_params.update(config)
+    return request_params
+
+
+def _log_response(response):
+    logger.info("%s API 调用成功", SUCCESS_ICON)
+    if logger.isEnabledFor(logging.DEBUG):
+        content = response.choices[0].message.content
+        logger.debug("响应内容: %s%s", content[:500], "..." if len(content) > 500 else "")
+
+
+@_with_retry
 def generate_content_with_retry(model, messages, config=None):
     """带重试机制的内容生成函数"""
-    try:
-        logger.info(f"{WAIT_ICON} 正在调用 {api_provider} API...")
-        logger.info(f"模型: {model}")
-        logger.info(f"请求内容: {messages}")
-        logger.info(f"请求配置: {config}")
-
-        # 构建请求参数
-        request_params = {
-            "model": model,
-            "messages": messages
-        }
-        
-        # 添加额外配置
-        if config:
-            request_params.update(config)
-
-        response = client.chat.completions.create(**request_params)
+    response = _get_client(*_active_endpoint).chat.completions.create(
+        **_build_request(model, messages, config))
+    _log_response(response)
+    return response
+
+
+@_with_retry
+async def agenerate_content_with_retry(model, messages, config=None):
+    """带重试机制的异步内容生成函数，重试等待不阻塞事件循环"""
+    response = await _get_async_client(*_active_endpoint).chat.completions.create(
+        **_build_request(model, messages, config))
+    _log_response(response)
+    return response
+
+
+def _format_messages(messages, model):
+    """记录调用日志并原样返回消息列表（仅在非 -O 模式下校验格式）"""
+    logger.info("%s 使用模型: %s", WAIT_ICON, model)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("消息内容: %s", _truncate_for_log(repr(messages)))
+    if __debug__:
+        assert all("role" in message and "content" in message for message in messages), \
+            "每条消息都必须包含 role 和 content"
+    return messages
+
+
+def _extract_content(response):
+    """从 API 响应中取出文本内容"""
+    if response is None:
+        logger.warning("%s API 返回空值", ERROR_ICON)
+        return None
 
-        logger.info(f"{SUCCESS_ICON} API 调用成功")
-        logger.info(f"响应内容: {response.choices[0].message.content[:500]}..." if len(
-            response.choices[0].message.content) > 500 else f"响应内容: {response.choices[0].message.content}")
-        return response
-    except Exception as e:
-        error_msg = str(e).lower()
-        
-        # 根据不同提供商的错误信息判断是否需要重试
-        should_retry = False
-        if api_provider.lower() == "deepseek" and "afc is enabled" in error_msg:
-            should_retry = True
-            wait_time = 5
-        elif "rate_limit" in error_msg or "429" in error_msg:
-            should_retry = True
-            wait_time = 10
-        elif "timeout" in error_msg or "connection" in error_msg:
-            should_retry = True
-            wait_time = 3
-        
-        if should_retry:
-            logger.warning(f"{ERROR_ICON} API限制或网络错误，等待重试... 错误: {str(e)}")
-            time.sleep(wait_time)
-            raise e
-        else:
-            logger.error(f"{ERROR_ICON} API 调用失败: {str(e)}")
-            raise e
+    content = response.choices[0].message.content
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("API 原始响应: %s", _truncate_for_log(content))
+    logger.info("%s 成功获取响应", SUCCESS_ICON)
+    return content
 
 
 def get_chat_completion(messages, model=None, max_retries=3, initial_retry_delay=1, **kwargs):
@@ -207,79 +467,60 @@ def get_chat_completion(messages, model=None, max_retries=3, initial_retry_delay
     Args:
         messages: 消息列表
         model: 模型名称（可选，默认使用环境变量中的模型）
-        max_retries: 最大重试次数
-        initial_retry_delay: 初始重试延迟
+        max_retries: 已弃用，重试统一由 generate_content_with_retry 处理
+        initial_retry_delay: 已弃用，同上
         **kwargs: 传递给API的额外参数（如temperature, max_tokens等）
     
     Returns:
         str: API响应的文本内容
     """
     try:
-        if model is None:
-            model = model_name
-
-        logger.info(f"{WAIT_ICON} 使用模型: {model}")
-        logger.debug(f"消息内容: {messages}")
-
-        for attempt in range(max_retries):
-            try:
-                # 转换消息格式
-                formatted_messages = []
-                for message in messages:
-                    role = message["role"]
-                    content = message["content"]
-                    formatted_messages.append({
-                        "role": role,
-                        "content": content
-                    })
-
-                # 准备API调用配置
-                api_config = {}
-                if kwargs:
-                    api_config.update(kwargs)
-
-                # 调用 API
-                response = generate_content_with_retry(
-                    model=model,
-                    messages=formatted_messages,
-                    config=api_config
-                )
-
-                if response is None:
-                    logger.warning(
-                        f"{ERROR_ICON} 尝试 {attempt + 1}/{max_retries}: API 返回空值")
-                    if attempt < max_retries - 1:
-                        retry_delay = initial_retry_delay * (2 ** attempt)
-                        logger.info(f"{WAIT_ICON} 等待 {retry_delay} 秒后重试...")
-                        time.sleep(retry_delay)
-                        continue
-                    return None
+        model = model or model_name
+        # 调用 API（重试已在 generate_content_with_retry 中完成）
+        response = generate_content_with_retry(
+            model=model,
+            messages=_format_messages(messages, model),
+            config=dict(kwargs)
+        )
+        return _extract_content(response)
 
-                # 转换响应格式
-                chat_message = ChatMessage(content=response.choices[0].message.content)
-                chat_choice = ChatChoice(message=chat_message)
-                completion = ChatCompletion(choices=[chat_choice])
+    except Exception as e:
+        logger.error("%s 最终错误: %s", ERROR_ICON, e)
+        return None
 
-                logger.debug(f"API 原始响应: {response.choices[0].message.content}")
-                logger.info(f"{SUCCESS_ICON} 成功获取响应")
-                return completion.choices[0].message.content
 
-            except Exception as e:
-                logger.error(
-                    f"{ERROR_ICON} 尝试 {attempt + 1}/{max_retries} 失败: {str(e)}")
-                if attempt < max_retries - 1:
-                    retry_delay = initial_retry_delay * (2 ** attempt)
-                    logger.info(f"{WAIT_ICON} 等待 {retry_delay} 秒后重试...")
-                    time.sleep(retry_delay)
-                else:
-                    logger.error(f"{ERROR_ICON} 最终错误: {str(e)}")
-                    return None
+async def aget_chat_completion(messages, model=None, **kwargs):
+    """get_chat_completion 的异步版本，多个请求可在同一事件循环中并发"""
+    try:
+        model = model or model_name
+        response = await agenerate_content_with_retry(
+            model=model,
+            messages=_format_messages(messages, model),
+            config=dict(kwargs)
+        )
+        return _extract_content(response)
 
     except Exception as e:
-        logger.error(f"{ERROR_ICON} get_chat_completion 发生错误: {str(e)}")
+        logger.error("%s 最终错误: %s", ERROR_ICON, e)
         return None
 
 
+async def aget_chat_completions(batch, model=None, **kwargs):
+    """并发获取一批消息列表的结果，返回顺序与输入一致"""
+    return await asyncio.gather(
+        *(aget_chat_completion(messages, model=model, **kwargs) for messages in batch))
+
+
+def get_active_config():
+    """返回当前生效的 API 配置（导入时从环境变量解析，setup_provider 后更新），无需再次读取环境变量"""
+    return {
+        "api_key": _active_endpoint[1],
+        "api_base_url": api_base_url,
+        "model_name": model_name,
+        "api_provider": api_provider
+    }
+
+
 # 为不同API提供商提供便捷函数
 def get_openai_completion(messages, model="gpt-3.5-turbo", **kwargs):
     """OpenAI API调用"""
@@ -306,21 +547,28 @@ def get_siliconflow_completion(messages, model="deepseek-ai/DeepSeek-V2.5", **kw
     return get_chat_completion(messages, model=model, **kwargs)
 
 
+@dataclass(frozen=True)
+class ProviderConfig:
+    base_url: str
+    models: tuple
+    default_model: str
+
+
 # 提供商配置模板
 PROVIDER_CONFIGS = {
-    "openai": {
-        "base_url": "https://api.openai.com/v1",
-        "models": ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o"],
-        "default_model": "gpt-3.5-turbo"
-    },
-    "deepseek": {
-        "base_url": "https://api.deepseek.com",
-        "models": ["deepseek-chat", "deepseek-coder"],
-        "default_model": "deepseek-chat"
-    },
-    "siliconflow": {
-        "base_url": "https://api.siliconflow.cn/v1",
-        "models": [
+    "openai": ProviderConfig(
+        base_url="https://api.openai.com/v1",
+        models=("gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o"),
+        default_model="gpt-3.5-turbo"
+    ),
+    "deepseek": ProviderConfig(
+        base_url="https://api.deepseek.com",
+        models=("deepseek-chat", "deepseek-coder"),
+        default_model="deepseek-chat"
+    ),
+    "siliconflow": ProviderConfig(
+        base_url="https://api.siliconflow.cn/v1",
+        models=(
             "deepseek-ai/DeepSeek-V3",
             "deepseek-ai/DeepSeek-R1",
             "Qwen/Qwen3-32B",
@@ -328,29 +576,29 @@ PROVIDER_CONFIGS = {
             "Qwen/Qwen3-14B", 
             "Qwen/Qwen3-8B", 
             "Qwen/Qwen3-235B-A22B"
-        ],
-        "default_model": "deepseek-ai/DeepSeek-V3"
-    },
-    "anthropic": {
-        "base_url": "https://api.anthropic.com/v1",  # 如果有OpenAI兼容端点
-        "models": ["claude-3-sonnet-20240229", "claude-3-opus-20240229"],
-        "default_model": "claude-3-sonnet-20240229"
-    },
-    "ollama": {
-        "base_url": "http://localhost:11434/v1",
-        "models": ["llama2", "codellama", "mistral"],
-        "default_model": "llama2"
-    },
-    "together": {
-        "base_url": "https://api.together.xyz/v1",
-        "models": ["meta-llama/Llama-2-7b-chat-hf", "meta-llama/Llama-2-13b-chat-hf"],
-        "default_model": "meta-llama/Llama-2-7b-chat-hf"
-    },
-    "groq": {
-        "base_url": "https://api.groq.com/openai/v1",
-        "models": ["mixtral-8x7b-32768", "llama2-70b-4096"],
-        "default_model": "mixtral-8x7b-32768"
-    }
+        ),
+        default_model="deepseek-ai/DeepSeek-V3"
+    ),
+    "anthropic": ProviderConfig(
+        base_url="https://api.anthropic.com/v1",  # 如果有OpenAI兼容端点
+        models=("claude-3-sonnet-20240229", "claude-3-opus-20240229"),
+        default_model="claude-3-sonnet-20240229"
+    ),
+    "ollama": ProviderConfig(
+        base_url="http://localhost:11434/v1",
+        models=("llama2", "codellama", "mistral"),
+        default_model="llama2"
+    ),
+    "together": ProviderConfig(
+        base_url="https://api.together.xyz/v1",
+        models=("meta-llama/Llama-2-7b-chat-hf", "meta-llama/Llama-2-13b-chat-hf"),
+        default_model="meta-llama/Llama-2-7b-chat-hf"
+    ),
+    "groq": ProviderConfig(
+        base_url="https://api.groq.com/openai/v1",
+        models=("mixtral-8x7b-32768", "llama2-70b-4096"),
+        default_model="mixtral-8x7b-32768"
+    )
 }
 
 
@@ -361,25 +609,16 @@ def setup_provider(provider_name, api_key, model=None):
     
     config = PROVIDER_CONFIGS[provider_name]
     
-    # 更新环境变量
-    os.environ["API_KEY"] = api_key
-    os.environ["API_BASE_URL"] = config["base_url"]
-    os.environ["API_PROVIDER"] = provider_name
-    os.environ["MODEL_NAME"] = model or config["default_model"]
-    
-    logger.info(f"{SUCCESS_ICON} 已设置API提供商: {provider_name}")
-    logger.info(f"  模型: {os.environ['MODEL_NAME']}")
-    logger.info(f"  基础URL: {config['base_url']}")
-    
-    # 重新初始化客户端
-    global client, api_provider, api_base_url, model_name
+    # 切换当前提供商（客户端按 base_url 和 api_key 缓存复用）
+    global client, api_provider, api_base_url, model_name, _active_endpoint
     api_provider = provider_name
-    api_base_url = config["base_url"]
-    model_name = os.environ["MODEL_NAME"]
+    api_base_url = config.base_url
+    model_name = model or config.default_model
+    _active_endpoint = (api_base_url, api_key)
+    client = _get_client(*_active_endpoint)
     
-    client = OpenAI(
-        api_key=api_key,
-        base_url=api_base_url
-    )
+    logger.info("%s 已设置API提供商: %s", SUCCESS_ICON, provider_name)
+    logger.info("  模型: %s", model_name)
+    logger.info("  基础URL: %s", api_base_url)
     
-    return client
\ No newline at end of file
+    return client
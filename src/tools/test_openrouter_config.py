@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import email.utils
+
+import httpx
+import openai
+import pytest
+
+# 添加项目根目录到 Python 路径
+project_root = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+# 模块导入时要求配置 API_KEY；这里只测试重试辅助函数，不发起请求
+os.environ.setdefault("API_KEY", "test-key")
+
+from src.tools.openrouter_config import (  # noqa: E402
+    RETRY_MAX_DELAY,
+    _is_retryable,
+    _next_retry_delay,
+    _retry_after_seconds,
+)
+
+RETRY_CONFIG = {"max_tries": 5, "max_time": 300}
+
+
+def _status_error(status_code, headers=None):
+    """构造带指定状态码和响应头的 openai 异常"""
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    error_types = {
+        400: openai.BadRequestError,
+        429: openai.RateLimitError,
+        500: openai.InternalServerError,
+        503: openai.InternalServerError,
+    }
+    error_type = error_types.get(status_code, openai.APIStatusError)
+    return error_type("error", response=response, body=None)
+
+
+def test_retry_after_seconds():
+    """Retry-After 支持秒数、毫秒和 HTTP 日期，缺失或无法解析时返回 None"""
+    assert _retry_after_seconds(_status_error(429, {"retry-after": "7"})) == 7.0
+    assert _retry_after_seconds(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert _retry_after_seconds(_status_error(429)) is None
+    assert _retry_after_seconds(_status_error(429, {"retry-after": "soon"})) is None
+    assert _retry_after_seconds(ValueError("no response")) is None
+
+    retry_at = email.utils.formatdate(time.time() + 20, usegmt=True)
+    assert 15 <= _retry_after_seconds(_status_error(429, {"retry-after": retry_at})) <= 20
+
+
+@pytest.mark.parametrize("status_code, retryable", [
+    (429, True), (500, True), (503, True), (408, True), (409, True), (400, False), (404, False),
+])
+def test_is_retryable_status_codes(status_code, retryable):
+    assert _is_retryable(_status_error(status_code)) is retryable
+
+
+def test_is_retryable_connection_errors():
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    assert _is_retryable(openai.APITimeoutError(request=request))
+    assert _is_retryable(RuntimeError("AFC is enabled, please retry"))
+    assert not _is_retryable(RuntimeError("invalid model"))
+
+
+def test_next_retry_delay_honours_retry_after():
+    delay = _next_retry_delay(0, _status_error(429, {"retry-after": "5"}), time.monotonic(), RETRY_CONFIG)
+    assert delay == 5.0
+
+
+def test_next_retry_delay_stops_when_retry_after_exceeds_cap():
+    error = _status_error(429, {"retry-after": str(RETRY_MAX_DELAY + 1)})
+    assert _next_retry_delay(0, error, time.monotonic(), RETRY_CONFIG) is None
+
+
+def test_next_retry_delay_backoff_is_bounded():
+    for attempt in range(RETRY_CONFIG["max_tries"] - 1):
+        delay = _next_retry_delay(attempt, None, time.monotonic(), RETRY_CONFIG)
+        assert 0 < delay <= RETRY_MAX_DELAY
+
+
+def test_next_retry_delay_respects_limits():
+    """达到最大重试次数或超出总时长时不再重试"""
+    last_attempt = RETRY_CONFIG["max_tries"] - 1
+    assert _next_retry_delay(last_attempt, None, time.monotonic(), RETRY_CONFIG) is None
+
+    started = time.monotonic() - RETRY_CONFIG["max_time"]
+    assert _next_retry_delay(0, None, started, RETRY_CONFIG) is None
@@ -14,7 +14,9 @@ Usage:
 import os
 import sys
 import argparse
+import functools
 from pathlib import Path
+from dotenv import dotenv_values
 
 # Add src directory to path
 sys.path.append(str(Path(__file__).parent / "src"))
@@ -23,6 +25,7 @@ try:
     from src.tools.openrouter_config import (
         get_chat_completion, 
         setup_provider, 
+        get_active_config,
         PROVIDER_CONFIGS,
         logger
     )
@@ -98,8 +101,8 @@ def interactive_setup():
     print("\nAvailable providers:")
     for i, (provider, config) in enumerate(PROVIDER_CONFIGS.items(), 1):
         print(f"{i}. {provider.upper()}")
-        print(f"   Base URL: {config['base_url']}")
-        print(f"   Models: {', '.join(config['models'][:3])}{'...' if len(config['models']) > 3 else ''}")
+        print(f"   Base URL: {config.base_url}")
+        print(f"   Models: {', '.join(config.models[:3])}{'...' if len(config.models) > 3 else ''}")
         print()
     
     while True:
@@ -131,25 +134,25 @@ def interactive_setup():
     
     # Select model
     print(f"\nAvailable models for {provider_name}:")
-    for i, model in enumerate(config['models'], 1):
-        default_marker = " (default)" if model == config['default_model'] else ""
+    for i, model in enumerate(config.models, 1):
+        default_marker = " (default)" if model == config.default_model else ""
         print(f"{i}. {model}{default_marker}")
     
-    model_choice = input(f"\nSelect model (1-{len(config['models'])}) or press Enter for default: ").strip()
+    model_choice = input(f"\nSelect model (1-{len(config.models)}) or press Enter for default: ").strip()
     
     if model_choice:
         try:
             model_idx = int(model_choice) - 1
-            if 0 <= model_idx < len(config['models']):
-                model = config['models'][model_idx]
+            if 0 <= model_idx < len(config.models):
+                model = config.models[model_idx]
             else:
                 print("Invalid choice, using default model")
-                model = config['default_model']
+                model = config.default_model
         except ValueError:
             print("Invalid input, using default model")
-            model = config['default_model']
+            model = config.default_model
     else:
-        model = config['default_model']
+        model = config.default_model
     
     print(f"\n🔧 Configuring {provider_name} with model {model}...")
     
@@ -165,7 +168,7 @@ def interactive_setup():
             # Save to .env file
             save_choice = input("\nSave this configuration to .env file? (y/N): ").strip().lower()
             if save_choice in ['y', 'yes']:
-                save_to_env(provider_name, api_key, model, config['base_url'])
+                save_to_env(provider_name, api_key, model, config.base_url)
             
             return True
         else:
@@ -177,6 +180,12 @@ def interactive_setup():
         return False
 
 
+@functools.lru_cache(maxsize=1)
+def load_env_file():
+    """Parse .env once; cleared whenever save_to_env rewrites the file"""
+    return dotenv_values('.env')
+
+
 def save_to_env(provider, api_key, model, base_url):
     """Save configuration to .env file"""
     env_content = f"""# AI Investment System API Configuration
@@ -196,6 +205,7 @@ API_PROVIDER={provider}
     try:
         with open('.env', 'w') as f:
             f.write(env_content)
+        load_env_file.cache_clear()
         print("✅ Configuration saved to .env file")
     except Exception as e:
         print(f"❌ Failed to save .env file: {str(e)}")
@@ -213,11 +223,10 @@ def check_env_file():
     required_vars = ['API_KEY']
     missing_vars = []
     
-    with open('.env', 'r') as f:
-        env_content = f.read()
-    
+    env_values = load_env_file()
     for var in required_vars:
-        if f"{var}=" not in env_content or f"{var}=your-" in env_content:
+        value = env_values.get(var) or ""
+        if not value or value.startswith("your-"):
             missing_vars.append(var)
     
     if missing_vars:
@@ -233,16 +242,17 @@ def show_current_config():
     print("\n📋 Current API Configuration:")
     print("-" * 40)
     
+    active = get_active_config()
     config_vars = [
         ('API_KEY', '***hidden***'),
-        ('API_BASE_URL', os.getenv('API_BASE_URL', 'Not set')),
-        ('MODEL_NAME', os.getenv('MODEL_NAME', 'Not set')),
-        ('API_PROVIDER', os.getenv('API_PROVIDER', 'Not set'))
+        ('API_BASE_URL', active['api_base_url'] or 'Not set'),
+        ('MODEL_NAME', active['model_name'] or 'Not set'),
+        ('API_PROVIDER', active['api_provider'] or 'Not set')
     ]
     
     for var, value in config_vars:
         if var == 'API_KEY':
-            api_key = os.getenv('API_KEY')
+            api_key = active['api_key']
             if api_key:
                 display_value = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***set***"
             else:
@@ -0,0 +1,139 @@
+"""
+Tests for the batch screener's array kernels, price cache, ranking and decision parsing
+
+Usage:
+    python -m pytest test_batch_screener.py
+"""
+
+import numpy as np
+import pytest
+
+from batch_screener import (
+    BatchAnalyzer,
+    PriceCache,
+    RankingEngine,
+    ScreeningConfig,
+    StockAnalysis,
+    TECHNICAL_FACTORS,
+    _score_matrix,
+)
+
+
+def _bars(dates, closes):
+    return {
+        'date': np.array(dates, dtype='U10'),
+        'close': np.array(closes, dtype=np.float32),
+        'volume': np.full(len(dates), 100.0, dtype=np.float32),
+    }
+
+
+def _analysis(symbol, score, valuation='neutral', fundamental='neutral'):
+    return StockAnalysis(
+        symbol=symbol, name=symbol, composite_score=score,
+        agent_signals={'valuation': {'signal': valuation}, 'fundamental': {'signal': fundamental}},
+        key_reasons=[], risk_factors=[], current_price=0.0,
+    )
+
+
+def test_score_matrix_flat_prices():
+    """Flat prices and volumes: neutral momentum/trend, full volatility score, mid volume score"""
+    close = np.full((30, 2), 10.0, dtype=np.float32)
+    volume = np.full((30, 2), 1000.0, dtype=np.float32)
+    weights = np.ones(len(TECHNICAL_FACTORS), dtype=np.float32)
+
+    scores = _score_matrix(close, volume, weights)
+
+    assert scores.shape == (2,)
+    np.testing.assert_allclose(scores, 0.5 + 0.5 + 1.0 + 1.0, rtol=1e-6)
+
+
+def test_score_matrix_ranks_uptrend_above_downtrend():
+    days = np.arange(30, dtype=np.float32)
+    close = np.stack([10 + 0.05 * days, 10 - 0.05 * days], axis=1)
+    volume = np.full((30, 2), 1000.0, dtype=np.float32)
+    weights = np.array([0.3, 0.3, 0.2, 0.2], dtype=np.float32)
+
+    up, down = _score_matrix(close, volume, weights)
+
+    assert up > down
+
+
+def test_score_matrix_ignores_nan_padding():
+    """A NaN-padded shorter history scores like the same bars without padding"""
+    close = np.linspace(10, 11, 25, dtype=np.float32)
+    volume = np.full(25, 1000.0, dtype=np.float32)
+    weights = np.array([0.3, 0.3, 0.2, 0.2], dtype=np.float32)
+    padded_close = np.concatenate([np.full(5, np.nan, dtype=np.float32), close])
+    padded_volume = np.concatenate([np.full(5, np.nan, dtype=np.float32), volume])
+
+    plain = _score_matrix(close[:, None], volume[:, None], weights)
+    padded = _score_matrix(padded_close[:, None], padded_volume[:, None], weights)
+
+    np.testing.assert_allclose(padded, plain, rtol=1e-5)
+
+
+def test_price_cache_merge_round_trip(tmp_path):
+    cache = PriceCache(tmp_path)
+    cache.set('600036', _bars(['2024-01-02', '2024-01-03'], [30.0, 31.0]))
+    cache.set('000001', _bars(['2024-01-02'], [10.0]))
+    cache.save()
+
+    # Updating one symbol keeps the others and replaces its bars
+    cache = PriceCache(tmp_path)
+    cache.set('600036', _bars(['2024-01-03', '2024-01-04'], [31.0, 32.0]))
+    cache.save()
+
+    reloaded = PriceCache(tmp_path)
+    np.testing.assert_array_equal(reloaded.get('000001')['close'], [10.0])
+    np.testing.assert_array_equal(reloaded.get('600036')['date'], ['2024-01-03', '2024-01-04'])
+    np.testing.assert_array_equal(reloaded.get('600036')['close'], [31.0, 32.0])
+    assert len(reloaded.get('300750')['date']) == 0
+    # Columns stay sorted by symbol for the binary search in get
+    assert list(reloaded._columns['symbol']) == sorted(reloaded._columns['symbol'])
+
+
+def test_rank_stocks_returns_top_k_in_order():
+    analyses = [_analysis(f"{i:06d}", score) for i, score in enumerate([5.0, 50.0, 20.0, 40.0, 10.0])]
+
+    top = RankingEngine().rank_stocks(analyses, target_count=3)
+
+    assert [analysis.symbol for analysis in top] == ['000001', '000003', '000002']
+
+
+def test_rank_stocks_applies_signal_boosts():
+    analyses = [
+        _analysis('000001', 10.0),
+        _analysis('000002', 9.0, valuation='bullish'),
+        _analysis('000003', 8.5, fundamental='bullish'),
+    ]
+
+    top = RankingEngine().rank_stocks(analyses, target_count=2)
+
+    assert [analysis.symbol for analysis in top] == ['000002', '000001']
+    assert top[0].composite_score == pytest.approx(11.0)
+
+
+def test_rank_stocks_with_fewer_candidates_than_target():
+    analyses = [_analysis('000001', 1.0), _analysis('000002', 2.0)]
+
+    top = RankingEngine().rank_stocks(analyses, target_count=10)
+
+    assert [analysis.symbol for analysis in top] == ['000002', '000001']
+    assert RankingEngine().rank_stocks([], target_count=10) == []
+
+
+def test_parse_decision_result_accepts_percent_confidence():
+    analyzer = BatchAnalyzer(ScreeningConfig(), code_to_name={'600036': '招商银行'})
+    decision = """```json
+    {"action": "buy", "agent_signals": [
+        {"agent": "Valuation Analysis", "signal": "bullish", "confidence": "75%"},
+        {"agent": "Fundamental Analysis", "signal": "neutral", "confidence": 0.5}
+    ]}
+    ```"""
+
+    analysis = analyzer._parse_decision_result('600036', decision, tech_score=0.8)
+
+    assert analysis.name == '招商银行'
+    assert analysis.agent_signals['valuation'] == {'signal': 'bullish', 'confidence': 0.75}
+    assert analysis.agent_signals['fundamental']['confidence'] == pytest.approx(0.5)
+    assert analysis.composite_score == pytest.approx((0.75 * 0.35 + 0.5 * 0.30) * 100)
@@ -0,0 +1,121 @@
+"""
+Tests for the web interface helpers that do not need a running Streamlit session
+
+Usage:
+    python -m pytest test_web_interface.py
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("plotly")
+
+# web_interface imports the API configuration, which requires API_KEY; no requests are made here
+os.environ.setdefault("API_KEY", "test-key")
+
+import web_interface  # noqa: E402
+from enhanced_web_features import lttb_indices  # noqa: E402
+from web_interface import (  # noqa: E402
+    TranslationCache,
+    _CURRENT_RATIO_THRESHOLDS,
+    _DEBT_RATIO_THRESHOLDS,
+    _ROE_THRESHOLDS,
+    _downsample_ohlc,
+    _health_tier,
+)
+
+
+def _ohlc(n):
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n).strftime('%Y-%m-%d'),
+        'open': np.arange(n, dtype=float),
+        'high': np.arange(n, dtype=float) + 2,
+        'low': np.arange(n, dtype=float) - 2,
+        'close': np.arange(n, dtype=float) + 1,
+        'volume': np.ones(n),
+    })
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0.02, "较差"), (0.05, "较差"), (0.08, "一般"), (0.12, "良好"), (0.20, "优秀"),
+])
+def test_health_tier_higher_is_better(value, expected):
+    assert _health_tier(value, _ROE_THRESHOLDS) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0.2, "优秀"), (0.3, "良好"), (0.6, "一般"), (0.9, "较差"),
+])
+def test_health_tier_lower_is_better(value, expected):
+    assert _health_tier(value, _DEBT_RATIO_THRESHOLDS, lower_is_better=True) == expected
+
+
+def test_health_tier_missing_values_rate_worst():
+    assert _health_tier(None, _CURRENT_RATIO_THRESHOLDS) == "较差"
+    assert _health_tier(float('nan'), _CURRENT_RATIO_THRESHOLDS) == "较差"
+    assert _health_tier(float('nan'), _DEBT_RATIO_THRESHOLDS, lower_is_better=True) == "较差"
+
+
+def test_downsample_ohlc_keeps_short_frames():
+    df = _ohlc(10)
+    assert _downsample_ohlc(df, max_bars=10) is df
+
+
+def test_downsample_ohlc_merges_buckets():
+    df = _ohlc(1000)
+
+    merged = _downsample_ohlc(df, max_bars=400)
+
+    assert len(merged) <= 400
+    # Each bucket opens at its first bar, closes at its last and keeps the extremes
+    assert merged['open'].iloc[0] == df['open'].iloc[0]
+    assert merged['close'].iloc[-1] == df['close'].iloc[-1]
+    assert merged['date'].iloc[-1] == df['date'].iloc[-1]
+    assert merged['high'].max() == df['high'].max()
+    assert merged['low'].min() == df['low'].min()
+    assert merged['volume'].sum() == df['volume'].sum()
+
+
+def test_lttb_indices_keeps_endpoints_and_peaks():
+    y = np.zeros(1000)
+    y[500] = 10.0
+
+    keep = lttb_indices(y, 50)
+
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert 500 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_indices_short_series_is_unchanged():
+    np.testing.assert_array_equal(lttb_indices([1.0, 2.0, 3.0], 10), [0, 1, 2])
+
+
+def test_translation_cache_migrates_legacy_keys(tmp_path, monkeypatch):
+    md5_text, raw_text = "Revenue grew", "Margins fell"
+    cache_file = tmp_path / "translation_cache.json"
+    cache_file.write_text(json.dumps({
+        hashlib.md5(md5_text.encode('utf-8')).hexdigest(): "营收增长",
+        raw_text: {'translation': "利润率下降", 'timestamp': 0, 'original': raw_text},
+    }, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(web_interface.atexit, 'register', lambda *args, **kwargs: None)
+
+    cache = TranslationCache(cache_file)
+    assert cache.get(md5_text) == "营收增长"
+    assert cache.get(raw_text) == "利润率下降"
+    assert cache.get("Unseen text") is None
+    cache.flush()
+
+    # Legacy entries are rewritten under the BLAKE2b keys
+    saved = json.loads(cache_file.read_text(encoding='utf-8'))
+    assert saved == {
+        cache.get_cache_key(md5_text): "营收增长",
+        cache.get_cache_key(raw_text): "利润率下降",
+    }
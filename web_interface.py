@@ -11,38 +11,61 @@ Requirements:
 """
 
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+import atexit
+import functools
 import json
+import re
 import sys
 import os
 from datetime import datetime, timedelta
 import time
 import warnings
+from dataclasses import dataclass, field
+from typing import Any, Optional, TypedDict
 import hashlib
+import html
 from pathlib import Path
+from types import MappingProxyType
 # 优化的翻译函数，支持并行处理
 import concurrent.futures
 import threading
 
+try:
+    import orjson
+    _json_loads = orjson.loads  # 接受 str 或 bytes；orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+    
+    def _json_dump_bytes(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # orjson 为可选依赖，缺失时使用标准库
+    _json_loads = json.loads
+    
+    def _json_dump_bytes(obj):
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
 warnings.filterwarnings('ignore')
 
+# st.fragment (1.37+) / st.experimental_fragment (1.33+) 让控件交互只重跑所在区域；旧版本退化为普通函数
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+# 数据接口模块（依赖 akshare、bs4 等重量级库）在首次获取数据时才在各 _load_* 函数中导入
 try:
-    from src.main import run_hedge_fund
-    from src.tools.api import get_price_history, get_financial_metrics, get_market_data
-    from src.tools.news_crawler import get_stock_news, get_news_sentiment
-    from src.tools.openrouter_config import logger
+    from src.tools.openrouter_config import logger, get_active_config
 except ImportError as e:
     st.error(f"导入错误: {e}")
     st.error("请确保您在项目根目录运行此程序，并且已安装所有依赖")
     st.stop()
 
+@functools.lru_cache(maxsize=None)
+def load_run_hedge_fund():
+    """延迟导入分析流程（依赖 langgraph 等重量级模块），首次运行分析时才加载"""
+    from src.main import run_hedge_fund
+    return run_hedge_fund
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="AI投资决策系统",
@@ -51,8 +74,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS（Streamlit 每次重跑都会清除未重新渲染的元素，因此每次都需注入）
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -68,6 +91,11 @@ st.markdown("""
         border-radius: 0.5rem;
         margin: 0.5rem 0;
     }
+    .signal-grid {
+        display: grid;
+        grid-template-columns: repeat(auto-fit, minmax(max(160px, calc((100% - 16px) / 3)), 1fr));
+        gap: 8px;
+    }
     .signal-bullish {
         color: #00ff00;
         font-weight: bold;
@@ -99,7 +127,8 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # 在web_interface.py的导入部分添加
 try:
@@ -109,52 +138,127 @@ except ImportError:
     API_TRANSLATION_AVAILABLE = False
     print("警告：无法导入翻译API，将使用简单映射")
 
+# 翻译系统提示（模块级常量，避免每次调用重新构建）
+_TRANSLATION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """你是一个专业的金融投资翻译专家，擅长将英文的股票分析内容翻译成自然流畅的中文。
+
+    翻译要求：
+    1. 保持金融术语的专业性和准确性
+    2. 翻译要自然流畅，符合中文表达习惯
+    3. 保留原文的逻辑结构和语气
+    4. 对于专业术语，使用标准的中文金融术语
+
+    常见术语对照：
+    - bullish = 看涨/看好
+    - bearish = 看跌/看空  
+    - neutral = 中性
+    - technical analysis = 技术分析
+    - fundamental analysis = 基本面分析
+    - sentiment analysis = 情绪分析
+    - valuation analysis = 估值分析
+    - risk management = 风险管理
+    - confidence = 置信度
+    - fair value = 公允价值
+    - portfolio = 投资组合
+
+    请直接返回翻译结果，不要添加解释或前缀。"""
+}
+
+# LLM 返回内容中包裹 JSON 的 Markdown 代码块标记（行首的 ```json / ``` 与行尾的 ```）
+_CODE_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.MULTILINE)
+
+def is_mostly_chinese(text):
+    """判断文本是否已是中文：中文字符的UTF-8编码占3字节，
+    字节数超过字符数的1.6倍即中文字符超过30%"""
+    return len(text.encode('utf-8')) > len(text) * 1.6
+
 class TranslationCache:
-    """翻译缓存管理器"""
+    """翻译缓存管理器（延迟写盘：累计一定条数或显式 flush 时才保存）"""
+    
+    # 累计多少条未保存的翻译后写盘
+    FLUSH_THRESHOLD = 32
+    # 所有实例共用的锁，串行化并行翻译线程对缓存的修改和写盘
+    _lock = threading.RLock()
     
     def __init__(self, cache_file="translation_cache.json"):
         self.cache_file = Path(cache_file)
         self.cache = self._load_cache()
+        self._dirty = False
+        self._pending = 0
+        atexit.register(self.flush)
     
     def _load_cache(self):
         """加载缓存"""
         if self.cache_file.exists():
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return _json_loads(self.cache_file.read_bytes())
             except Exception as e:
                 print(f"加载翻译缓存失败: {e}")
         return {}
     
     def _save_cache(self):
         """保存缓存"""
-        try:
-            # 确保目录存在
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存翻译缓存失败: {e}")
+        with self._lock:
+            try:
+                # 确保目录存在
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                
+                # 先写临时文件再替换，避免中途退出导致缓存文件损坏
+                tmp_file = self.cache_file.with_suffix('.tmp')
+                tmp_file.write_bytes(_json_dump_bytes(self.cache))
+                os.replace(tmp_file, self.cache_file)
+                self._dirty = False
+                self._pending = 0
+            except Exception as e:
+                print(f"保存翻译缓存失败: {e}")
+    
+    def flush(self):
+        """将未保存的翻译写入磁盘"""
+        if self._dirty:
+            self._save_cache()
     
     def get_cache_key(self, text):
-        """生成缓存键"""
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
+        """生成缓存键（128 位 BLAKE2b 摘要，缓存文件不随原文长度增长）"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
     
     def get(self, text):
-        """获取缓存的翻译"""
+        """获取缓存的翻译文本，未缓存时返回 None"""
         cache_key = self.get_cache_key(text)
-        return self.cache.get(cache_key)
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            entry = self._migrate_legacy_entry(text, cache_key)
+        return entry
+    
+    def _migrate_legacy_entry(self, text, cache_key):
+        """查找旧版条目并迁移到新键，下次写盘即为新格式
+        
+        旧版条目以 MD5 摘要或原文为键，值可能是 {'translation', 'timestamp', 'original'} 字典。
+        """
+        with self._lock:
+            for legacy_key in (hashlib.md5(text.encode('utf-8')).hexdigest(), text):
+                entry = self.cache.pop(legacy_key, None)
+                if entry is not None:
+                    break
+            else:
+                return None
+            
+            if isinstance(entry, dict):
+                entry = entry.get('translation')
+            if entry:
+                self.cache[cache_key] = entry
+            self._dirty = True
+            return entry or None
     
     def set(self, text, translation):
         """设置缓存"""
         cache_key = self.get_cache_key(text)
-        self.cache[cache_key] = {
-            'translation': translation,
-            'timestamp': time.time(),
-            'original': text[:100]  # 存储原文前100字符用于调试
-        }
-        self._save_cache()
+        with self._lock:
+            self.cache[cache_key] = translation
+            self._dirty = True
+            self._pending += 1
+            if self._pending >= self.FLUSH_THRESHOLD:
+                self._save_cache()
 
 # 创建全局缓存实例
 translation_cache = TranslationCache()
@@ -162,74 +266,128 @@ translation_cache = TranslationCache()
 class TranslationManager:
     """翻译管理器，支持并行翻译和智能缓存"""
     
-    def __init__(self):
-        self.cache = TranslationCache()
+    def __init__(self, max_workers=None):
+        # 与 translate_with_api 共用同一个缓存实例，避免两份内存副本互相覆盖同一文件
+        self.cache = translation_cache
         self.lock = threading.Lock()
-    
-    def translate_multiple(self, texts, max_workers=3):
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 4) * 2)
+        self._executor = None
+    
+    @property
+    def executor(self):
+        """共享的翻译线程池，首次使用时创建，之后各次调用复用"""
+        if self._executor is None:
+            with self.lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='translate')
+                    atexit.register(self._executor.shutdown, wait=False)
+        return self._executor
+    
+    def translate_multiple(self, texts):
         """并行翻译多个文本"""
         if not texts:
             return []
         
         results = [None] * len(texts)
         
-        # 首先检查缓存
+        # 首先跳过无需翻译的文本并检查缓存
         uncached_indices = []
         for i, text in enumerate(texts):
+            if not text or not text.strip() or is_mostly_chinese(text):
+                results[i] = text
+                continue
             cached = self.cache.get(text)
             if cached:
-                results[i] = cached['translation']
+                results[i] = cached
             else:
                 uncached_indices.append(i)
         
-        # 并行翻译未缓存的文本
-        if uncached_indices:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_index = {
-                    executor.submit(translate_with_api, texts[i]): i 
-                    for i in uncached_indices
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_index):
-                    index = future_to_index[future]
-                    try:
-                        translation = future.result(timeout=30)  # 30秒超时
-                        results[index] = translation
-                    except Exception as e:
-                        print(f"并行翻译失败 (索引 {index}): {e}")
-                        results[index] = translate_with_simple_mapping(texts[index])
+        # 一次请求批量翻译未缓存的文本，解析失败的条目再逐条并行翻译
+        if uncached_indices and API_TRANSLATION_AVAILABLE:
+            batch = self._translate_batch([texts[i] for i in uncached_indices])
+            for index, translation in batch.items():
+                original_index = uncached_indices[index]
+                results[original_index] = translation
+                self.cache.set(texts[original_index], translation)
+            uncached_indices = [i for i in uncached_indices if results[i] is None]
         
+        if uncached_indices:
+            future_to_index = {
+                self.executor.submit(translate_with_api, texts[i]): i 
+                for i in uncached_indices
+            }
+            
+            for future in concurrent.futures.as_completed(future_to_index):
+                index = future_to_index[future]
+                try:
+                    translation = future.result(timeout=30)  # 30秒超时
+                    results[index] = translation
+                except Exception as e:
+                    print(f"并行翻译失败 (索引 {index}): {e}")
+                    results[index] = translate_with_simple_mapping(texts[index])
+        
+        self.cache.flush()
         return results
     
+    def _translate_batch(self, texts):
+        """将多个文本合并为一次API请求（JSON 对象进出），返回 {序号: 译文}（序号从0开始）
+        
+        回复的条目数与请求不一致或无法解析时返回空字典，由调用方逐条翻译；
+        单条译文未通过质量检查时不返回该条。
+        """
+        numbered = {str(n): text for n, text in enumerate(texts, 1)}
+        user_message = {
+            "role": "user",
+            "content": ("请将以下 JSON 对象中每个值（投资分析内容）翻译成中文，"
+                        "只返回键相同、值为译文的 JSON 对象：\n"
+                        + json.dumps(numbered, ensure_ascii=False))
+        }
+        try:
+            response = get_chat_completion(
+                [_TRANSLATION_SYSTEM_MESSAGE, user_message],
+                temperature=0.3,
+                max_tokens=500 * len(texts)
+            )
+            # strict=False：模型常在字符串值中直接输出换行
+            reply = json.loads(_CODE_FENCE.sub('', response or '').strip(), strict=False)
+        except Exception as e:
+            print(f"批量翻译失败: {e}")
+            return {}
+        
+        if not isinstance(reply, dict) or set(reply) != set(numbered):
+            print("批量翻译条目数不匹配，改为逐条翻译")
+            return {}
+        
+        translations = {}
+        for number, translation in reply.items():
+            if isinstance(translation, str) and _is_acceptable_translation(translation.strip()):
+                translations[int(number) - 1] = translation.strip()
+        return translations
+    
     def translate_decision_batch(self, decision_data):
-        """批量翻译决策相关内容"""
+        """批量翻译决策相关内容（已有 *_zh 译文的字段不再重复翻译）"""
         texts_to_translate = []
+        targets = []  # 与 texts_to_translate 一一对应的 (目标字典, 译文字段)
         
         # 收集需要翻译的文本
         reasoning = decision_data.get('reasoning', '')
-        if reasoning:
+        if reasoning and not decision_data.get('reasoning_zh'):
             texts_to_translate.append(reasoning)
+            targets.append((decision_data, 'reasoning_zh'))
         
         # 翻译agent信号中的描述（如果有）
         agent_signals = decision_data.get('agent_signals', [])
         for signal in agent_signals:
-            if 'description' in signal:
+            if 'description' in signal and not signal.get('description_zh'):
                 texts_to_translate.append(signal['description'])
+                targets.append((signal, 'description_zh'))
         
-        # 执行并行翻译
+        # 执行并行翻译，并将翻译结果映射回原数据
         if texts_to_translate:
             translations = self.translate_multiple(texts_to_translate)
-            
-            # 将翻译结果映射回原数据
-            translation_index = 0
-            if reasoning:
-                decision_data['reasoning_zh'] = translations[translation_index]
-                translation_index += 1
-            
-            for signal in agent_signals:
-                if 'description' in signal:
-                    signal['description_zh'] = translations[translation_index]
-                    translation_index += 1
+            for (target, key), translation in zip(targets, translations):
+                target[key] = translation
         
         return decision_data
 
@@ -237,47 +395,28 @@ class TranslationManager:
 translation_manager = TranslationManager()
 
 
+def _is_acceptable_translation(translation):
+    """基本质量检查：过短或以英文开头（模型在解释而非翻译）的结果视为失败"""
+    return len(translation) > 10 and not translation.startswith("I ")
+
 def translate_with_api(text, max_retries=2):
     """使用API进行智能翻译"""
     
     if not text or not text.strip():
         return text
     
+    # 已经是中文的文本无需翻译
+    if is_mostly_chinese(text):
+        return text
+    
     # 检查缓存
     cached_translation = translation_cache.get(text)
     if cached_translation:
-        return cached_translation['translation']
+        return cached_translation
     
     if not API_TRANSLATION_AVAILABLE:
         return translate_with_simple_mapping(text)
     
-    # 构建翻译提示
-    system_message = {
-        "role": "system",
-        "content": """你是一个专业的金融投资翻译专家，擅长将英文的股票分析内容翻译成自然流畅的中文。
-
-        翻译要求：
-        1. 保持金融术语的专业性和准确性
-        2. 翻译要自然流畅，符合中文表达习惯
-        3. 保留原文的逻辑结构和语气
-        4. 对于专业术语，使用标准的中文金融术语
-
-        常见术语对照：
-        - bullish = 看涨/看好
-        - bearish = 看跌/看空  
-        - neutral = 中性
-        - technical analysis = 技术分析
-        - fundamental analysis = 基本面分析
-        - sentiment analysis = 情绪分析
-        - valuation analysis = 估值分析
-        - risk management = 风险管理
-        - confidence = 置信度
-        - fair value = 公允价值
-        - portfolio = 投资组合
-
-        请直接返回翻译结果，不要添加解释或前缀。"""
-    }
-    
     user_message = {
         "role": "user", 
         "content": f"请将以下投资分析内容翻译成中文：\n\n{text}"
@@ -287,7 +426,7 @@ def translate_with_api(text, max_retries=2):
         try:
             # 调用API进行翻译
             response = get_chat_completion(
-                [system_message, user_message],
+                [_TRANSLATION_SYSTEM_MESSAGE, user_message],
                 temperature=0.3,  # 较低的温度确保翻译一致性
                 max_tokens=500    # 限制响应长度
             )
@@ -297,7 +436,7 @@ def translate_with_api(text, max_retries=2):
                 translation = response.strip()
                 
                 # 基本质量检查
-                if len(translation) > 10 and not translation.startswith("I "):
+                if _is_acceptable_translation(translation):
                     # 缓存翻译结果
                     translation_cache.set(text, translation)
                     return translation
@@ -315,90 +454,94 @@ def translate_with_api(text, max_retries=2):
     print("API翻译失败，使用简单映射")
     return translate_with_simple_mapping(text)
 
+# 简单映射翻译的术语表
+_SIMPLE_TRANSLATION_MAP = {
+    # 基本术语
+    "bullish": "看涨",
+    "bearish": "看跌", 
+    "neutral": "中性",
+    "technical signal": "技术信号",
+    "fundamental analysis": "基本面分析",
+    "sentiment": "情绪",
+    "valuation analysis": "估值分析",
+    "risk management": "风险管理",
+    "buy": "买入",
+    "sell": "卖出", 
+    "hold": "持有",
+    "confidence": "置信度",
+    "signal": "信号",
+    
+    # 常见表达
+    "Despite a": "尽管",
+    "making it difficult to assess": "使得难以评估",
+    "fair value": "公允价值",
+    "recommends": "建议",
+    "reducing position": "减少仓位",
+    "since there is no current position": "由于当前没有仓位",
+    "the appropriate action is to": "合适的行动是",
+    "due to conflicting signals": "由于信号冲突",
+    "Confidence is": "置信度",
+    "moderate due to": "由于...而适中",
+    "conflicting signals": "信号冲突",
+    "is invalid": "无效",
+    "invalid": "无效",
+    
+    # 技术分析术语
+    "technical analysis": "技术分析",
+    "price momentum": "价格动量",
+    "moving average": "移动平均线",
+    "volatility": "波动性",
+    "trend": "趋势",
+    "support": "支撑位",
+    "resistance": "阻力位",
+    
+    # 基本面术语
+    "earnings": "盈利",
+    "revenue": "营收",
+    "profit margin": "利润率",
+    "debt ratio": "负债比率",
+    "cash flow": "现金流",
+    "growth rate": "增长率",
+    
+    # 情绪分析
+    "positive sentiment": "积极情绪",
+    "negative sentiment": "消极情绪",
+    "news analysis": "新闻分析",
+    "market sentiment": "市场情绪",
+    
+    # 风险管理
+    "high risk": "高风险",
+    "low risk": "低风险",
+    "risk tolerance": "风险承受能力",
+    "portfolio": "投资组合",
+    "diversification": "分散投资"
+}
+
+# 按长度降序组成一个正则，一次扫描完成全部替换，较长的术语（如 "technical analysis"）优先匹配
+_SIMPLE_TRANSLATION_PATTERN = re.compile('|'.join(
+    re.escape(term) for term in sorted(_SIMPLE_TRANSLATION_MAP, key=len, reverse=True)))
+
 def translate_with_simple_mapping(text):
     """简单映射翻译（备选方案）"""
-    translation_map = {
-        # 基本术语
-        "bullish": "看涨",
-        "bearish": "看跌", 
-        "neutral": "中性",
-        "technical signal": "技术信号",
-        "fundamental analysis": "基本面分析",
-        "sentiment": "情绪",
-        "valuation analysis": "估值分析",
-        "risk management": "风险管理",
-        "buy": "买入",
-        "sell": "卖出", 
-        "hold": "持有",
-        "confidence": "置信度",
-        "signal": "信号",
-        
-        # 常见表达
-        "Despite a": "尽管",
-        "making it difficult to assess": "使得难以评估",
-        "fair value": "公允价值",
-        "recommends": "建议",
-        "reducing position": "减少仓位",
-        "since there is no current position": "由于当前没有仓位",
-        "the appropriate action is to": "合适的行动是",
-        "due to conflicting signals": "由于信号冲突",
-        "Confidence is": "置信度",
-        "moderate due to": "由于...而适中",
-        "conflicting signals": "信号冲突",
-        "is invalid": "无效",
-        "invalid": "无效",
-        
-        # 技术分析术语
-        "technical analysis": "技术分析",
-        "price momentum": "价格动量",
-        "moving average": "移动平均线",
-        "volatility": "波动性",
-        "trend": "趋势",
-        "support": "支撑位",
-        "resistance": "阻力位",
-        
-        # 基本面术语
-        "earnings": "盈利",
-        "revenue": "营收",
-        "profit margin": "利润率",
-        "debt ratio": "负债比率",
-        "cash flow": "现金流",
-        "growth rate": "增长率",
-        
-        # 情绪分析
-        "positive sentiment": "积极情绪",
-        "negative sentiment": "消极情绪",
-        "news analysis": "新闻分析",
-        "market sentiment": "市场情绪",
-        
-        # 风险管理
-        "high risk": "高风险",
-        "low risk": "低风险",
-        "risk tolerance": "风险承受能力",
-        "portfolio": "投资组合",
-        "diversification": "分散投资"
-    }
-    
-    result = text
-    for english, chinese in translation_map.items():
-        result = result.replace(english, chinese)
-    
-    return result
+    return _SIMPLE_TRANSLATION_PATTERN.sub(lambda m: _SIMPLE_TRANSLATION_MAP[m.group(0)], text)
 
-def translate_reasoning_to_chinese(reasoning):
-    """将决策理由翻译为中文 - 使用API智能翻译"""
+@st.cache_data(ttl=86400, show_spinner=False)
+def _cached_translate_reasoning(reasoning, use_api):
+    """按原文和翻译模式缓存决策理由的翻译结果"""
+    return translate_reasoning_to_chinese(reasoning, use_api)
+
+def translate_reasoning_to_chinese(reasoning, use_api=True):
+    """将决策理由翻译为中文 - 使用API智能翻译（use_api 为 False 时仅用简单映射）"""
     if not reasoning or reasoning == "无详细说明":
         return "系统未提供详细的决策理由。建议结合各项指标综合考虑。"
     
     # 检查是否已经是中文
-    chinese_char_count = len([c for c in reasoning if ord(c) > 127])
-    if chinese_char_count > len(reasoning) * 0.3:
-        # 如果中文字符超过30%，认为已经是中文
+    if is_mostly_chinese(reasoning):
         return reasoning
     
     try:
         # 使用API翻译
-        translated = translate_with_api(reasoning)
+        translated = translate_with_api(reasoning) if use_api else translate_with_simple_mapping(reasoning)
         
         # 如果翻译结果太短或明显失败，提供默认解释
         if len(translated) < 20 or translated == reasoning:
@@ -424,66 +567,62 @@ def translate_reasoning_to_chinese(reasoning):
         # 出错时使用简单映射
         return translate_with_simple_mapping(reasoning)
 
-def batch_translate_agent_names(agent_signals):
+# 标准agent名称映射（快速路径）
+_STANDARD_AGENT_NAMES = MappingProxyType({
+    'Technical Analysis': '技术分析',
+    'Fundamental Analysis': '基本面分析',
+    'Sentiment Analysis': '情绪分析',
+    'Valuation Analysis': '估值分析',
+    'Risk Management': '风险管理',
+    'Portfolio Management': '投资组合管理'
+})
+
+# agent名称关键词映射，合并为一个正则一次扫描
+_AGENT_KEYWORD_NAMES = MappingProxyType({
+    'technical': '技术分析',
+    'fundamental': '基本面分析', 
+    'sentiment': '情绪分析',
+    'valuation': '估值分析',
+    'risk': '风险管理',
+    'portfolio': '投资组合管理',
+    '技术': '技术分析',
+    '基本面': '基本面分析',
+    '情绪': '情绪分析',
+    '估值': '估值分析',
+    '风险': '风险管理'
+})
+_AGENT_KEYWORD_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in _AGENT_KEYWORD_NAMES))
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _translate_agent_names(agent_names, use_api):
+    """翻译一组agent名称，按名称元组和翻译模式缓存"""
+    return tuple(
+        _STANDARD_AGENT_NAMES.get(agent_name) or smart_agent_name_mapping(agent_name, use_api)
+        for agent_name in agent_names
+    )
+
+def batch_translate_agent_names(agent_signals, use_api=True):
     """批量翻译agent名称（优化版本）"""
+    agent_names = tuple(signal.get('agent', 'Unknown') for signal in agent_signals)
+    translated_names = _translate_agent_names(agent_names, use_api)
     
-    # 标准映射（快速路径）
-    standard_mapping = {
-        'Technical Analysis': '技术分析',
-        'Fundamental Analysis': '基本面分析',
-        'Sentiment Analysis': '情绪分析',
-        'Valuation Analysis': '估值分析',
-        'Risk Management': '风险管理',
-        'Portfolio Management': '投资组合管理'
-    }
-    
-    translated_signals = []
-    
-    for signal in agent_signals:
-        agent_name = signal.get('agent', 'Unknown')
-        
-        # 首先尝试标准映射
-        if agent_name in standard_mapping:
-            translated_name = standard_mapping[agent_name]
-        else:
-            # 使用智能匹配
-            translated_name = smart_agent_name_mapping(agent_name)
-        
-        translated_signals.append({
-            **signal,
-            'translated_name': translated_name
-        })
-    
-    return translated_signals
+    return [
+        {**signal, 'translated_name': translated_name}
+        for signal, translated_name in zip(agent_signals, translated_names)
+    ]
 
-def smart_agent_name_mapping(agent_name):
+def smart_agent_name_mapping(agent_name, use_api=True):
     """智能agent名称映射"""
     if not agent_name or agent_name == 'Unknown':
         return '未知模块'
     
     # 关键词匹配
-    name_lower = agent_name.lower()
-    
-    keyword_mapping = {
-        'technical': '技术分析',
-        'fundamental': '基本面分析', 
-        'sentiment': '情绪分析',
-        'valuation': '估值分析',
-        'risk': '风险管理',
-        'portfolio': '投资组合管理',
-        '技术': '技术分析',
-        '基本面': '基本面分析',
-        '情绪': '情绪分析',
-        '估值': '估值分析',
-        '风险': '风险管理'
-    }
-    
-    for keyword, chinese_name in keyword_mapping.items():
-        if keyword in name_lower:
-            return chinese_name
+    match = _AGENT_KEYWORD_PATTERN.search(agent_name.lower())
+    if match:
+        return _AGENT_KEYWORD_NAMES[match.group(0)]
     
     # 如果都匹配不到，尝试API翻译（仅对于合理长度的文本）
-    if len(agent_name) > 3 and len(agent_name) < 50:
+    if use_api and len(agent_name) > 3 and len(agent_name) < 50:
         try:
             translated = translate_with_api(f"In stock analysis context, translate this agent name: {agent_name}")
             if translated and translated != agent_name and len(translated) < 20:
@@ -571,87 +710,287 @@ def add_translation_settings_to_sidebar():
     
     return translation_method
 
+# 信号显示样式：(图标, 中文, CSS类)，未知信号按中性处理
+_SIGNAL_STYLES = {
+    'bullish': ("🟢", "看涨", 'signal-bullish'),
+    'bearish': ("🔴", "看跌", 'signal-bearish'),
+    'neutral': ("🟡", "中性", 'signal-neutral'),
+}
+_SIGNAL_STYLE_TABLE = pd.DataFrame.from_dict(
+    _SIGNAL_STYLES, orient='index', columns=['emoji', 'text', 'css_class'])
+
+@functools.lru_cache(maxsize=32)
 def get_signal_color(signal):
     """Get color class for signal display"""
-    if signal.lower() == 'bullish':
-        return 'signal-bullish'
-    elif signal.lower() == 'bearish':
-        return 'signal-bearish'
-    else:
-        return 'signal-neutral'
+    return _SIGNAL_STYLES.get(signal.lower(), _SIGNAL_STYLES['neutral'])[2]
 
+@functools.lru_cache(maxsize=128)
 def format_signal_display(signal, confidence):
     """Format signal for display"""
-    color_class = get_signal_color(signal)
-    if signal.lower() == 'bullish':
-        emoji = "🟢"
-        text = "看涨"
-    elif signal.lower() == 'bearish':
-        emoji = "🔴"
-        text = "看跌"
-    else:
-        emoji = "🟡"
-        text = "中性"
-    
+    emoji, text, color_class = _SIGNAL_STYLES.get(signal.lower(), _SIGNAL_STYLES['neutral'])
     return f"{emoji} <span class='{color_class}'>{text}</span> ({confidence})"
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_stock_data(symbol, days=365):
-    """Fetch stock data with caching"""
-    try:
-        end_date = datetime.now() - timedelta(days=1)
-        start_date = end_date - timedelta(days=days)
-        
-        df = get_price_history(
-            symbol, 
-            start_date.strftime('%Y-%m-%d'), 
-            end_date.strftime('%Y-%m-%d')
-        )
-        
-        if df is None or df.empty:
-            return None
-            
-        return df
-    except Exception as e:
-        st.error(f"获取股票数据失败: {str(e)}")
+def format_signals_display(agent_signals):
+    """Format a list of agent signals for display in one vectorized pass
+    
+    Returns a DataFrame with one row per signal, holding the display name
+    ('translated_name', falling back to 'agent') and the rendered 'html'.
+    """
+    signals = pd.DataFrame(list(agent_signals)).reindex(
+        columns=['agent', 'signal', 'confidence', 'translated_name'])
+    signals = signals.fillna({'agent': 'Unknown', 'signal': 'neutral', 'confidence': 0})
+    signals['translated_name'] = signals['translated_name'].fillna(signals['agent'])
+    
+    signal_lower = signals['signal'].astype(str).str.lower()
+    signal_lower = signal_lower.where(signal_lower.isin(_SIGNAL_STYLES), 'neutral')
+    styles = _SIGNAL_STYLE_TABLE.reindex(signal_lower).set_axis(signals.index)
+    
+    # 字符串置信度原样显示，数值按百分比显示，其它值显示 N/A
+    confidence = signals['confidence']
+    is_text = confidence.map(type).eq(str)
+    numeric = pd.to_numeric(confidence.mask(is_text), errors='coerce')
+    confidence_str = (numeric * 100).map('{:.0f}%'.format).where(numeric.notna(), "N/A")
+    confidence_str = confidence_str.where(~is_text, confidence.astype(str))
+    
+    signals['html'] = (styles['emoji'] + " <span class='" + styles['css_class'] + "'>"
+                       + styles['text'] + "</span> (" + confidence_str + ")")
+    return signals[['translated_name', 'html']]
+
+def _moving_average(values, window):
+    """Trailing simple moving average; the first window-1 values are NaN, as with rolling().mean()"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        cumsum = np.cumsum(np.insert(values, 0, 0.0))
+        result[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return result
+
+_PRICE_COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+def _load_price_history(symbol, days, as_of=None):
+    """Load price history ending the day before as_of (defaults to today)"""
+    from src.tools.api import get_price_history
+    
+    end_date = (as_of or datetime.now().date()) - timedelta(days=1)
+    start_date = end_date - timedelta(days=days)
+    
+    df = get_price_history(
+        symbol, 
+        start_date.strftime('%Y-%m-%d'), 
+        end_date.strftime('%Y-%m-%d')
+    )
+    
+    if df is None or df.empty:
         return None
+    
+    # Keep only what the chart uses; get_price_history also derives ~25 factor columns
+    df = df[list(_PRICE_COLUMNS)].reset_index(drop=True)
+    
+    # Precompute chart moving averages here so chart rendering is plotting only
+    close = df['close'].to_numpy(dtype=float)
+    df['ma5'] = _moving_average(close, 5)
+    df['ma20'] = _moving_average(close, 20)
+    
+    return df
 
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
-def fetch_financial_data(symbol):
-    """Fetch financial data with caching"""
-    try:
-        financial_metrics = get_financial_metrics(symbol)
-        market_data = get_market_data(symbol)
-        return financial_metrics, market_data
-    except Exception as e:
-        st.error(f"获取财务数据失败: {str(e)}")
-        return None, None
+def _load_financial_data(symbol):
+    """Load financial metrics and market data"""
+    from src.tools.api import get_financial_metrics, get_market_data
+    
+    return get_financial_metrics(symbol), get_market_data(symbol)
 
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
-def fetch_news_data(symbol, num_news=10):
-    """Fetch news data with caching"""
+# st.cache_data 函数只能在脚本线程调用（工作线程没有 ScriptRunContext）。
+# 下面的缓存函数都接受一个不参与缓存键的 _load 参数：脚本线程先用
+# _cache_lookup 查缓存（未命中时不计算），未命中的源在线程池里运行普通的
+# _load_* 函数，结果再回到脚本线程用 _cache_store 写入缓存。
+_CACHE_MISS = object()
+
+class _CacheMiss(Exception):
+    """由 _raise_cache_miss 抛出，使查询缓存时未命中也不会触发计算（异常不会被缓存）"""
+
+def _raise_cache_miss():
+    raise _CacheMiss
+
+def _cache_lookup(cached_func, *args):
+    """返回 cached_func(*args) 的缓存值，未命中时返回 _CACHE_MISS（不计算）"""
     try:
-        news_list = get_stock_news(symbol, max_news=num_news)
-        
-        # Filter recent news (last 7 days)
-        cutoff_date = datetime.now() - timedelta(days=7)
-        recent_news = [
-            news for news in news_list
-            if datetime.strptime(news['publish_time'], '%Y-%m-%d %H:%M:%S') > cutoff_date
-        ]
-        
-        sentiment_score = get_news_sentiment(recent_news, num_of_news=min(len(recent_news), num_news))
-        
-        return recent_news, sentiment_score
-    except Exception as e:
-        st.error(f"获取新闻数据失败: {str(e)}")
-        return [], 0.0
+        return cached_func(*args, _load=_raise_cache_miss)
+    except _CacheMiss:
+        return _CACHE_MISS
+
+def _cache_store(cached_func, value, *args):
+    """将已加载的 value 写入 cached_func(*args) 的缓存并返回"""
+    return cached_func(*args, _load=lambda: value)
+
+def _news_sentiment(news_list, num_of_news):
+    """Sentiment score of the first num_of_news items (no Streamlit calls, safe on worker threads)"""
+    from src.tools.news_crawler import get_news_sentiment
+    
+    return get_news_sentiment(news_list, num_of_news=num_of_news)
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _cached_news_sentiment(content_key, _news_list, num_of_news, _load=None):
+    """Sentiment score for a news list, cached by content_key (a digest of the analysed news)"""
+    return _load() if _load else _news_sentiment(_news_list, num_of_news)
+
+def _news_content_key(news_list):
+    """Digest of the fields get_news_sentiment keys its own cache on"""
+    signature = "|".join(
+        f"{news.get('title')}|{str(news.get('content'))[:100]}|{news.get('publish_time')}"
+        for news in news_list
+    )
+    return hashlib.md5(signature.encode('utf-8')).hexdigest()
+
+def _load_news_data(symbol, num_news=10):
+    """Load news from the last 7 days"""
+    from src.tools.news_crawler import get_stock_news
+    
+    news_list = get_stock_news(symbol, max_news=num_news)
+    
+    # Filter recent news (last 7 days)
+    recent_news = []
+    if news_list:
+        publish_times = pd.to_datetime(
+            [news.get('publish_time') for news in news_list],
+            format='%Y-%m-%d %H:%M:%S', errors='coerce')
+        is_recent = publish_times > pd.Timestamp.now() - pd.Timedelta(days=7)
+        recent_news = [news for news, recent in zip(news_list, is_recent) if recent]
+    
+    return recent_news
+
+# Each source is cached with its own TTL; failures raise and are not cached
+@st.cache_data(ttl=3600, show_spinner=False)  # Daily bars up to the day before as_of
+def fetch_stock_data(symbol, days=365, as_of=None, _load=None):
+    """Fetch stock data with caching"""
+    return _load() if _load else _load_price_history(symbol, days, as_of)
+
+@st.cache_data(ttl=86400, show_spinner=False)  # Financial data changes at most daily
+def fetch_financial_data(symbol, _load=None):
+    """Fetch financial data with caching"""
+    return _load() if _load else _load_financial_data(symbol)
+
+@st.cache_data(ttl=3600, show_spinner=False)  # News changes hourly
+def fetch_news_data(symbol, num_news=10, _load=None):
+    """Fetch recent news with caching"""
+    return _load() if _load else _load_news_data(symbol, num_news)
+
+@dataclass
+class StockDataBundle:
+    """Price, financial and news data fetched together for one symbol"""
+    df: Optional[pd.DataFrame] = None
+    financial_metrics: Any = None
+    market_data: Any = None
+    news_list: list = field(default_factory=list)
+    sentiment_score: float = 0.0
+    errors: dict = field(default_factory=dict)
+
+def fetch_all_data(symbol, days, num_news, as_of):
+    """Fetch price, financial and news data concurrently
+    
+    Each source has its own cached fetch_* function, so prices, financials
+    and news expire independently. Cache lookups and stores happen on the
+    script thread; only the plain _load_* loaders (and the news sentiment
+    call) run on the thread pool. as_of is the (day-resolution) date the
+    price window ends at, so the cache key stays stable within a trading day.
+    Failures are collected in ``errors`` (keyed by 'price', 'financial' and
+    'news') for the caller to report.
+    """
+    bundle = StockDataBundle()
+    sources = {
+        'price': (fetch_stock_data, (symbol, days, as_of), _load_price_history),
+        'financial': (fetch_financial_data, (symbol,), _load_financial_data),
+        'news': (fetch_news_data, (symbol, num_news), _load_news_data),
+    }
+    results = {}
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {}
+        sentiment_args = None
+        
+        def start_sentiment(news_list):
+            """Score the news from cache, or submit the sentiment call and return its future"""
+            nonlocal sentiment_args
+            num_of_news = min(len(news_list), num_news)
+            analysed_news = news_list[:num_of_news]
+            sentiment_args = (_news_content_key(analysed_news), analysed_news, num_of_news)
+            score = _cache_lookup(_cached_news_sentiment, *sentiment_args)
+            if score is not _CACHE_MISS:
+                bundle.sentiment_score = score
+                return None
+            future = executor.submit(_news_sentiment, analysed_news, num_of_news)
+            futures[future] = 'sentiment'
+            return future
+        
+        for kind, (cached_func, args, loader) in sources.items():
+            value = _cache_lookup(cached_func, *args)
+            if value is _CACHE_MISS:
+                futures[executor.submit(loader, *args)] = kind
+            else:
+                results[kind] = value
+        if 'news' in results:
+            start_sentiment(results['news'])
+        
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                kind = futures[future]
+                try:
+                    value = future.result()
+                except Exception as e:
+                    bundle.errors['news' if kind == 'sentiment' else kind] = str(e)
+                    continue
+                if kind == 'sentiment':
+                    bundle.sentiment_score = _cache_store(_cached_news_sentiment, value, *sentiment_args)
+                    continue
+                cached_func, args, _ = sources[kind]
+                results[kind] = _cache_store(cached_func, value, *args)
+                if kind == 'news':
+                    sentiment_future = start_sentiment(results['news'])
+                    if sentiment_future:
+                        pending.add(sentiment_future)
+    
+    bundle.df = results.get('price')
+    if 'financial' in results:
+        bundle.financial_metrics, bundle.market_data = results['financial']
+    bundle.news_list = results.get('news') or []
+    return bundle
+
+# K线图的固定布局参数
+_CHART_LAYOUT = MappingProxyType(dict(
+    xaxis_rangeslider_visible=False,
+    height=600,
+    showlegend=True,
+    template="plotly_white",
+))
+
+# K线图最多发送到浏览器的柱数，超出时按相邻交易日合并
+CHART_MAX_BARS = 400
+
+_OHLC_AGGREGATION = {
+    'date': 'last', 'open': 'first', 'high': 'max', 'low': 'min',
+    'close': 'last', 'volume': 'sum', 'ma5': 'last', 'ma20': 'last',
+}
+
+def _downsample_ohlc(df, max_bars=CHART_MAX_BARS):
+    """Merge consecutive bars so at most max_bars are plotted (high/low extremes are kept)"""
+    if len(df) <= max_bars:
+        return df
+    bucket_size = -(-len(df) // max_bars)
+    aggregation = {col: how for col, how in _OHLC_AGGREGATION.items() if col in df.columns}
+    buckets = np.arange(len(df)) // bucket_size
+    return df.groupby(buckets).agg(aggregation).reset_index(drop=True)
 
 def create_candlestick_chart(df, symbol):
     """Create candlestick chart with volume"""
     if df is None or df.empty:
         return None
     
+    df = _downsample_ohlc(df)
+    
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
     # Create subplots with secondary y-axis
     fig = make_subplots(
         rows=2, cols=1,
@@ -676,14 +1015,10 @@ def create_candlestick_chart(df, symbol):
         row=1, col=1
     )
     
-    # Add moving averages if available
-    if 'momentum_1m' in df.columns:
-        # Calculate simple moving averages for display
-        df['ma5'] = df['close'].rolling(window=5).mean()
-        df['ma20'] = df['close'].rolling(window=20).mean()
-        
+    # Add moving averages if available (precomputed by _load_price_history)
+    if 'ma5' in df.columns and 'ma20' in df.columns:
         fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=df['date'],
                 y=df['ma5'],
                 mode='lines',
@@ -694,7 +1029,7 @@ def create_candlestick_chart(df, symbol):
         )
         
         fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=df['date'],
                 y=df['ma20'],
                 mode='lines',
@@ -710,19 +1045,13 @@ def create_candlestick_chart(df, symbol):
             x=df['date'],
             y=df['volume'],
             name="成交量",
-            marker_color='lightblue'
+            marker=dict(color='lightblue', line=dict(width=0))
         ),
         row=2, col=1
     )
     
     # Update layout
-    fig.update_layout(
-        title=f"{symbol} - 股价走势图",
-        xaxis_rangeslider_visible=False,
-        height=600,
-        showlegend=True,
-        template="plotly_white"
-    )
+    fig.update_layout(title=f"{symbol} - 股价走势图", **_CHART_LAYOUT)
     
     fig.update_xaxes(title_text="日期", row=2, col=1)
     fig.update_yaxes(title_text="价格 (元)", row=1, col=1)
@@ -730,6 +1059,30 @@ def create_candlestick_chart(df, symbol):
     
     return fig
 
+@st.cache_resource(ttl=300, max_entries=32, show_spinner=False)
+def _cached_candlestick_chart(_df, symbol, fingerprint):
+    """Build the candlestick go.Figure once per symbol and price fingerprint
+    
+    _df is excluded from hashing; fingerprint (see _price_fingerprint) identifies its contents.
+    cache_resource returns the same Figure without pickling, and st.plotly_chart
+    only serializes a Figure, whereas a plain dict would be re-validated on every rerun.
+    The cached figure is shared, so callers must not modify it.
+    """
+    return create_candlestick_chart(_df, symbol)
+
+def _price_fingerprint(df):
+    """Cheap identity for a price frame: row count, first/last date and last close"""
+    if df is None or df.empty:
+        return (0,)
+    return (len(df), str(df['date'].iloc[0]), str(df['date'].iloc[-1]), float(df['close'].iloc[-1]))
+
+# 基本信息中按列展示的财务指标：(标签, 字段, 格式)
+_BASIC_INFO_METRICS = (
+    (("市盈率 (PE)", 'pe_ratio', "{:.2f}"), ("市净率 (PB)", 'price_to_book', "{:.2f}")),
+    (("净资产收益率", 'return_on_equity', "{:.2%}"), ("净利率", 'net_margin', "{:.2%}")),
+    (("营收增长率", 'revenue_growth', "{:.2%}"), ("净利润增长率", 'earnings_growth', "{:.2%}")),
+)
+
 def display_basic_info(symbol, market_data, financial_metrics, latest_price):
     """Display basic stock information"""
     st.subheader("📊 基本信息")
@@ -748,23 +1101,27 @@ def display_basic_info(symbol, market_data, financial_metrics, latest_price):
                 value=f"¥{market_data.get('market_cap', 0)/100000000:.2f}亿" if market_data.get('market_cap') else "N/A"
             )
         
-        with col2:
-            pe_ratio = financial_metrics[0].get('pe_ratio', 0) if financial_metrics else 0
-            pb_ratio = financial_metrics[0].get('price_to_book', 0) if financial_metrics else 0
-            st.metric(label="市盈率 (PE)", value=f"{pe_ratio:.2f}" if pe_ratio else "N/A")
-            st.metric(label="市净率 (PB)", value=f"{pb_ratio:.2f}" if pb_ratio else "N/A")
-        
-        with col3:
-            roe = financial_metrics[0].get('return_on_equity', 0) if financial_metrics else 0
-            net_margin = financial_metrics[0].get('net_margin', 0) if financial_metrics else 0
-            st.metric(label="净资产收益率", value=f"{roe*100:.2f}%" if roe else "N/A")
-            st.metric(label="净利率", value=f"{net_margin*100:.2f}%" if net_margin else "N/A")
-        
-        with col4:
-            revenue_growth = financial_metrics[0].get('revenue_growth', 0) if financial_metrics else 0
-            earnings_growth = financial_metrics[0].get('earnings_growth', 0) if financial_metrics else 0
-            st.metric(label="营收增长率", value=f"{revenue_growth*100:.2f}%" if revenue_growth else "N/A")
-            st.metric(label="净利润增长率", value=f"{earnings_growth*100:.2f}%" if earnings_growth else "N/A")
+        metrics = financial_metrics[0] or {}
+        for column, column_metrics in zip((col2, col3, col4), _BASIC_INFO_METRICS):
+            with column:
+                for label, key, value_format in column_metrics:
+                    value = metrics.get(key, 0)
+                    st.metric(label=label, value=value_format.format(value) if value else "N/A")
+
+# 财务健康评级，阈值按升序排列
+_HEALTH_TIERS = ("较差", "一般", "良好", "优秀")
+_ROE_THRESHOLDS = np.array([0.05, 0.10, 0.15])
+_NET_MARGIN_THRESHOLDS = np.array([0.05, 0.10, 0.20])
+_CURRENT_RATIO_THRESHOLDS = np.array([1.0, 1.5, 2.0])
+_DEBT_RATIO_THRESHOLDS = np.array([0.3, 0.5, 0.7])
+
+def _health_tier(value, thresholds, lower_is_better=False):
+    """按严格超过（或严格低于）的阈值个数给出评级；缺失值（None/NaN）评为最差"""
+    if value is None or np.isnan(value):
+        return _HEALTH_TIERS[0]
+    if lower_is_better:
+        return _HEALTH_TIERS[::-1][np.searchsorted(thresholds, value, side='right')]
+    return _HEALTH_TIERS[np.searchsorted(thresholds, value, side='left')]
 
 def display_financial_health(financial_metrics):
     """Display financial health analysis"""
@@ -776,41 +1133,87 @@ def display_financial_health(financial_metrics):
     
     metrics = financial_metrics[0]
     
+    # Ratings
+    roe = metrics.get('return_on_equity', 0)
+    roe_status = _health_tier(roe, _ROE_THRESHOLDS)
+    net_margin = metrics.get('net_margin', 0)
+    margin_status = _health_tier(net_margin, _NET_MARGIN_THRESHOLDS)
+    op_margin = metrics.get('operating_margin', 0)
+    current_ratio = metrics.get('current_ratio', 0)
+    liquidity_status = _health_tier(current_ratio, _CURRENT_RATIO_THRESHOLDS)
+    debt_ratio = metrics.get('debt_to_equity', 0)
+    debt_status = _health_tier(debt_ratio, _DEBT_RATIO_THRESHOLDS, lower_is_better=True)
+    revenue_growth = metrics.get('revenue_growth', 0)
+    
     col1, col2 = st.columns(2)
     
+    # One markdown element per column instead of one per line
     with col1:
-        st.markdown("**盈利能力**")
-        
-        # ROE assessment
-        roe = metrics.get('return_on_equity', 0)
-        roe_status = "优秀" if roe > 0.15 else "良好" if roe > 0.10 else "一般" if roe > 0.05 else "较差"
-        st.markdown(f"• 净资产收益率: {roe*100:.2f}% ({roe_status})")
-        
-        # Net margin assessment
-        net_margin = metrics.get('net_margin', 0)
-        margin_status = "优秀" if net_margin > 0.20 else "良好" if net_margin > 0.10 else "一般" if net_margin > 0.05 else "较差"
-        st.markdown(f"• 净利率: {net_margin*100:.2f}% ({margin_status})")
-        
-        # Operating margin
-        op_margin = metrics.get('operating_margin', 0)
-        st.markdown(f"• 营业利润率: {op_margin*100:.2f}%")
+        st.markdown("\n\n".join([
+            "**盈利能力**",
+            f"• 净资产收益率: {roe*100:.2f}% ({roe_status})",
+            f"• 净利率: {net_margin*100:.2f}% ({margin_status})",
+            f"• 营业利润率: {op_margin*100:.2f}%",
+        ]))
     
     with col2:
-        st.markdown("**财务状况**")
-        
-        # Current ratio
-        current_ratio = metrics.get('current_ratio', 0)
-        liquidity_status = "优秀" if current_ratio > 2.0 else "良好" if current_ratio > 1.5 else "一般" if current_ratio > 1.0 else "较差"
-        st.markdown(f"• 流动比率: {current_ratio:.2f} ({liquidity_status})")
-        
-        # Debt to equity
-        debt_ratio = metrics.get('debt_to_equity', 0)
-        debt_status = "优秀" if debt_ratio < 0.3 else "良好" if debt_ratio < 0.5 else "一般" if debt_ratio < 0.7 else "较差"
-        st.markdown(f"• 资产负债率: {debt_ratio*100:.2f}% ({debt_status})")
-        
-        # Growth metrics
-        revenue_growth = metrics.get('revenue_growth', 0)
-        st.markdown(f"• 营收增长率: {revenue_growth*100:.2f}%")
+        st.markdown("\n\n".join([
+            "**财务状况**",
+            f"• 流动比率: {current_ratio:.2f} ({liquidity_status})",
+            f"• 资产负债率: {debt_ratio*100:.2f}% ({debt_status})",
+            f"• 营收增长率: {revenue_growth*100:.2f}%",
+        ]))
+
+# 情绪仪表盘的固定图表配置，由 _sentiment_gauge_figure 填入分数和颜色
+_SENTIMENT_GAUGE = {
+    'axis': {'range': [-1, 1]},
+    'steps': [
+        {'range': [-1, -0.3], 'color': "lightcoral"},
+        {'range': [-0.3, 0.3], 'color': "lightyellow"},
+        {'range': [0.3, 1], 'color': "lightgreen"}
+    ],
+    'threshold': {
+        'line': {'color': "red", 'width': 4},
+        'thickness': 0.75,
+        'value': 0
+    }
+}
+_SENTIMENT_INDICATOR = {
+    'type': 'indicator',
+    'mode': "gauge+number",
+    'domain': {'x': [0, 1], 'y': [0, 1]},
+    'title': {'text': "情绪指标"},
+}
+_SENTIMENT_GAUGE_LAYOUT = {'height': 250}
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _sentiment_gauge_figure(sentiment_score, sentiment_color):
+    """Build the sentiment gauge go.Figure once per score and bar colour
+    
+    st.plotly_chart re-validates plain dicts on every call but only serializes a
+    Figure, so the validated figure is cached (shared, must not be modified).
+    """
+    import plotly.graph_objects as go
+    
+    gauge = dict(_SENTIMENT_GAUGE, bar={'color': sentiment_color})
+    return go.Figure({
+        'data': [dict(_SENTIMENT_INDICATOR, value=sentiment_score, gauge=gauge)],
+        'layout': _SENTIMENT_GAUGE_LAYOUT,
+    })
+
+def _news_item_html(news):
+    """Render one news item as a collapsible <details> block (all fields HTML-escaped)"""
+    parts = [
+        f"<details><summary>{html.escape(str(news['title'])[:50])}...</summary>",
+        f"<p><strong>来源:</strong> {html.escape(str(news['source']))}</p>",
+        f"<p><strong>时间:</strong> {html.escape(str(news['publish_time']))}</p>",
+        f"<p><strong>内容:</strong> {html.escape(str(news['content'])[:200])}...</p>",
+    ]
+    url = news.get('url')
+    if url and str(url).startswith(('http://', 'https://')):
+        parts.append(f'<p><a href="{html.escape(str(url))}" target="_blank">查看原文</a></p>')
+    parts.append("</details>")
+    return "".join(parts)
 
 def display_news_summary(news_list, sentiment_score):
     """Display news summary and sentiment"""
@@ -822,13 +1225,9 @@ def display_news_summary(news_list, sentiment_score):
         st.markdown("**最新新闻**")
         
         if news_list:
-            for i, news in enumerate(news_list[:5]):  # Show top 5 news
-                with st.expander(f"{news['title'][:50]}..."):
-                    st.markdown(f"**来源:** {news['source']}")
-                    st.markdown(f"**时间:** {news['publish_time']}")
-                    st.markdown(f"**内容:** {news['content'][:200]}...")
-                    if news.get('url'):
-                        st.markdown(f"[查看原文]({news['url']})")
+            # Top 5 news as native <details> elements in a single markdown element
+            st.markdown("".join(_news_item_html(news) for news in news_list[:5]),
+                        unsafe_allow_html=True)
         else:
             st.info("暂无最新新闻")
     
@@ -836,8 +1235,12 @@ def display_news_summary(news_list, sentiment_score):
         st.markdown("**情绪分析**")
         
         # Sentiment gauge
-        sentiment_text = "积极" if sentiment_score > 0.3 else "消极" if sentiment_score < -0.3 else "中性"
-        sentiment_color = "green" if sentiment_score > 0.3 else "red" if sentiment_score < -0.3 else "orange"
+        if sentiment_score > 0.3:
+            sentiment_text, sentiment_color = "积极", "green"
+        elif sentiment_score < -0.3:
+            sentiment_text, sentiment_color = "消极", "red"
+        else:
+            sentiment_text, sentiment_color = "中性", "orange"
         
         st.metric(
             label="整体情绪",
@@ -845,29 +1248,8 @@ def display_news_summary(news_list, sentiment_score):
             delta=f"分数: {sentiment_score:.2f}"
         )
         
-        # Sentiment bar
-        fig_sentiment = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=sentiment_score,
-            domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "情绪指标"},
-            gauge={
-                'axis': {'range': [-1, 1]},
-                'bar': {'color': sentiment_color},
-                'steps': [
-                    {'range': [-1, -0.3], 'color': "lightcoral"},
-                    {'range': [-0.3, 0.3], 'color': "lightyellow"},
-                    {'range': [0.3, 1], 'color': "lightgreen"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 0
-                }
-            }
-        ))
-        
-        fig_sentiment.update_layout(height=250)
+        # Sentiment bar: only the value and bar colour vary, the rest is the static spec
+        fig_sentiment = _sentiment_gauge_figure(float(sentiment_score), sentiment_color)
         st.plotly_chart(fig_sentiment, use_container_width=True)
 
 def display_investment_decision(decision_result):
@@ -945,12 +1327,97 @@ def display_investment_decision(decision_result):
     '''
     return display_investment_decision_with_api_translation(decision_result)
 
-def display_decision_content(action, quantity, confidence, agent_signals, reasoning):
-    """Display the actual decision content with API translation"""
+# 决策卡片模板及各操作的 (图标, 中文)，未知操作显示为未知
+_DECISION_CARD_TEMPLATE = (
+    '<div class="decision-{action}">'
+    '<h3>{emoji} 推荐操作: {action_text}</h3>'
+    '<p><strong>数量:</strong> {quantity:,} 股</p>'
+    '<p><strong>置信度:</strong> {confidence:.1f}%</p>'
+    '</div>'
+)
+_ACTION_STYLES = {
+    'buy': ("🟢", "买入"),
+    'sell': ("🔴", "卖出"),
+    'hold': ("🟡", "持有"),
+}
+_UNKNOWN_ACTION_STYLE = ("⚪", "未知")
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _render_signal_grid_html(signal_items, use_api):
+    """将 (agent, signal, confidence) 元组渲染为信号卡片网格HTML（自适应宽度，最多3列）"""
+    agent_signals = [
+        {'agent': agent, 'signal': signal, 'confidence': confidence}
+        for agent, signal, confidence in signal_items
+    ]
+    # 使用批量翻译优化性能
+    signals_display = format_signals_display(batch_translate_agent_names(agent_signals, use_api))
+    cards = ('<div class="metric-container"><strong>' + signals_display['translated_name'].astype(str)
+             + '</strong><br>' + signals_display['html'] + '</div>')
+    return f'<div class="signal-grid">{"".join(cards)}</div>'
+
+class DecisionView(TypedDict):
+    """规范化后的投资决策；JSON解析、文本提取和兜底显示都经由 display_decision_content 渲染"""
+    action: str
+    quantity: int
+    confidence: Any
+    agent_signals: list
+    reasoning: str
+
+def _decision_view(decision):
+    """从决策字典生成 DecisionView，缺失字段使用默认值"""
+    return DecisionView(
+        action=str(decision.get('action') or 'hold').strip().lower(),
+        quantity=decision.get('quantity', 0),
+        confidence=decision.get('confidence', 0),
+        agent_signals=decision.get('agent_signals', []),
+        reasoning=decision.get('reasoning', '无详细说明'),
+    )
+
+# 从非JSON文本中提取决策的模式
+_EMBEDDED_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+_ACTION_WORD = re.compile(r'\b(buy|sell|hold)\b|(买入|卖出|持有)', re.IGNORECASE)
+_QUANTITY_FIELD = re.compile(r'(?:quantity|数量)["\']?\s*[:：=]\s*(\d+)', re.IGNORECASE)
+_CONFIDENCE_FIELD = re.compile(r'(?:confidence|置信度)["\']?\s*[:：=]\s*([\d.]+%?)', re.IGNORECASE)
+_CHINESE_ACTIONS = {'买入': 'buy', '卖出': 'sell', '持有': 'hold'}
+
+def extract_decision_from_text(text):
+    """从无法直接解析为JSON的文本中提取决策，无法识别操作时返回 None"""
+    # 文本中嵌有JSON对象（如前后带说明文字）
+    match = _EMBEDDED_OBJECT.search(text)
+    if match:
+        try:
+            decision = _json_loads(match.group(0))
+        except json.JSONDecodeError:
+            decision = None
+        if isinstance(decision, dict) and 'action' in decision:
+            return _decision_view(decision)
+    
+    # 按关键词提取操作、数量和置信度，全文作为决策理由
+    action_match = _ACTION_WORD.search(text)
+    if not action_match:
+        return None
+    action = (action_match.group(1) or '').lower() or _CHINESE_ACTIONS[action_match.group(2)]
+    quantity_match = _QUANTITY_FIELD.search(text)
+    confidence_match = _CONFIDENCE_FIELD.search(text)
+    return DecisionView(
+        action=action,
+        quantity=int(quantity_match.group(1)) if quantity_match else 0,
+        confidence=confidence_match.group(1) if confidence_match else 0,
+        agent_signals=[],
+        reasoning=text,
+    )
+
+def display_fallback_decision():
+    """无法获得有效决策时，按默认持有建议显示"""
+    display_decision_content(_decision_view({}), use_api=False)
+
+def display_decision_content(view, use_api=True):
+    """Display a normalized decision (DecisionView) with API translation (simple mapping only when use_api is False)"""
+    action, quantity, confidence = view['action'], view['quantity'], view['confidence']
+    agent_signals, reasoning = view['agent_signals'], view['reasoning']
+    
     # Main decision display
-    decision_class = f"decision-{action}"
-    action_text = "买入" if action == "buy" else "卖出" if action == "sell" else "持有"
-    action_emoji = "🟢" if action == "buy" else "🔴" if action == "sell" else "🟡"
+    action_emoji, action_text = _ACTION_STYLES.get(action, _UNKNOWN_ACTION_STYLE)
     
     # 确保confidence是数字
     if isinstance(confidence, str):
@@ -959,56 +1426,29 @@ def display_decision_content(action, quantity, confidence, agent_signals, reason
         except:
             confidence = 0.5
     
-    st.markdown(f"""
-    <div class="{decision_class}">
-        <h3>{action_emoji} 推荐操作: {action_text}</h3>
-        <p><strong>数量:</strong> {quantity:,} 股</p>
-        <p><strong>置信度:</strong> {confidence*100:.1f}%</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_DECISION_CARD_TEMPLATE.format(
+        action=action, emoji=action_emoji, action_text=action_text,
+        quantity=quantity, confidence=confidence * 100
+    ), unsafe_allow_html=True)
     
     # Agent signals breakdown with API translation
     if agent_signals:
         st.markdown("**各分析模块信号**")
         
-        # 使用批量翻译优化性能
-        translated_signals = batch_translate_agent_names(agent_signals)
-        
-        # 动态调整列数
-        num_signals = len(translated_signals)
-        if num_signals <= 3:
-            signal_cols = st.columns(num_signals)
-        else:
-            signal_cols = st.columns(3)
-        
-        for i, signal_data in enumerate(translated_signals):
-            with signal_cols[i % len(signal_cols)]:
-                agent_name = signal_data.get('agent', 'Unknown')
-                agent_signal = signal_data.get('signal', 'neutral')
-                agent_confidence = signal_data.get('confidence', 0)
-                translated_name = signal_data.get('translated_name', agent_name)
-                
-                # 处理置信度格式
-                if isinstance(agent_confidence, str):
-                    confidence_str = agent_confidence
-                else:
-                    confidence_str = f"{agent_confidence*100:.0f}%" if isinstance(agent_confidence, (int, float)) else "N/A"
-                
-                signal_html = format_signal_display(agent_signal, confidence_str)
-                
-                st.markdown(f"""
-                <div class="metric-container">
-                    <strong>{translated_name}</strong><br>
-                    {signal_html}
-                </div>
-                """, unsafe_allow_html=True)
+        # 信号卡片HTML按信号内容缓存，与决策无关的控件交互触发重跑时不再重建
+        signal_items = tuple(
+            (signal.get('agent', 'Unknown'), signal.get('signal', 'neutral'), signal.get('confidence', 0))
+            for signal in agent_signals
+        )
+        st.markdown(_render_signal_grid_html(signal_items, use_api),
+                    unsafe_allow_html=True)
     
     # Detailed reasoning with API translation
     st.markdown("**决策理由**")
     
     # 显示翻译进度
     with st.spinner("正在翻译决策理由..."):
-        translated_reasoning = translate_reasoning_to_chinese(reasoning)
+        translated_reasoning = _cached_translate_reasoning(reasoning, use_api)
     
     # 显示翻译结果
     st.info(translated_reasoning)
@@ -1038,34 +1478,49 @@ def display_investment_decision_with_api_translation(decision_result):
             key="translation_mode"
         )
     
-    # 根据选择的翻译模式设置全局变量
-    if translation_mode == "简单映射":
-        # 临时禁用API翻译
-        global API_TRANSLATION_AVAILABLE
-        temp_api_status = API_TRANSLATION_AVAILABLE
-        API_TRANSLATION_AVAILABLE = False
+    # 根据选择的翻译模式决定是否使用API翻译（作为参数逐层传递，不修改全局状态）
+    use_api = API_TRANSLATION_AVAILABLE and translation_mode == "API翻译"
+    
+    # 规范化并解析决策结果，调试信息与主显示共用同一次解析
+    raw_result = decision_result
+    decision, parse_error = None, None
+    if decision_result:
+        # 转换为字符串（如果不是）
+        if isinstance(decision_result, bytes):
+            decision_result = decision_result.decode('utf-8', errors='replace')
+        elif not isinstance(decision_result, str):
+            decision_result = str(decision_result)
+        
+        # 清理可能的格式问题
+        decision_result = decision_result.strip()
+        
+        # 检查是否包含JSON标记并清理
+        if decision_result.startswith('```'):
+            decision_result = _CODE_FENCE.sub('', decision_result).strip()
+        
+        try:
+            decision = _json_loads(decision_result)
+        except json.JSONDecodeError as e:
+            parse_error = e
     
     # 调试信息（可选）
     with st.expander("🔧 调试信息", expanded=False):
-        st.write("decision_result 类型:", type(decision_result))
-        st.write("decision_result 长度:", len(str(decision_result)) if decision_result else 0)
+        st.write("decision_result 类型:", type(raw_result))
+        st.write("decision_result 长度:", len(str(raw_result)) if raw_result else 0)
         
         # 翻译系统状态
         translation_stats = get_translation_stats()
         st.write("翻译系统状态:", translation_stats)
         
-        # 如果是字符串，尝试解析并显示agent信息
-        if isinstance(decision_result, str) and decision_result.strip():
-            try:
-                test_parse = json.loads(decision_result.strip().replace('```json', '').replace('```', ''))
-                if 'agent_signals' in test_parse:
-                    st.write("原始agent信号:")
-                    for signal in test_parse['agent_signals']:
-                        st.write(f"- Agent: {signal.get('agent', 'Unknown')}")
-                        st.write(f"  Signal: {signal.get('signal', 'unknown')}")
-                        st.write(f"  Confidence: {signal.get('confidence', 'unknown')}")
-            except:
-                st.write("无法解析为JSON格式")
+        # 显示解析出的agent信息
+        if isinstance(decision, dict) and 'agent_signals' in decision:
+            st.write("原始agent信号:")
+            for signal in decision['agent_signals']:
+                st.write(f"- Agent: {signal.get('agent', 'Unknown')}")
+                st.write(f"  Signal: {signal.get('signal', 'unknown')}")
+                st.write(f"  Confidence: {signal.get('confidence', 'unknown')}")
+        elif parse_error is not None:
+            st.write("无法解析为JSON格式")
     
     # 检查是否为空值
     if not decision_result:
@@ -1073,43 +1528,15 @@ def display_investment_decision_with_api_translation(decision_result):
         display_fallback_decision()
         return
     
-    # 转换为字符串（如果不是）
-    if not isinstance(decision_result, str):
-        decision_result = str(decision_result)
-    
-    # 清理可能的格式问题
-    decision_result = decision_result.strip()
-    
-    # 检查是否包含JSON标记并清理
-    if decision_result.startswith('```json'):
-        decision_result = decision_result.replace('```json', '').replace('```', '').strip()
-    
-    try:
-        # 尝试解析JSON
-        decision = json.loads(decision_result)
-        
-        # 验证必要字段
-        if not isinstance(decision, dict):
-            raise ValueError("决策结果不是有效的字典格式")
-            
-        action = decision.get('action', 'hold')
-        quantity = decision.get('quantity', 0)
-        confidence = decision.get('confidence', 0)
-        agent_signals = decision.get('agent_signals', [])
-        reasoning = decision.get('reasoning', '无详细说明')
-        
-        # 显示决策结果（使用API翻译）
-        display_decision_content(action, quantity, confidence, agent_signals, reasoning)
-        
-    except json.JSONDecodeError as e:
-        st.error(f"❌ JSON解析失败: {str(e)}")
+    if parse_error is not None:
+        st.error(f"❌ JSON解析失败: {str(parse_error)}")
         st.warning("尝试从文本中提取决策信息...")
         
         # 尝试从文本中提取信息
         extracted_decision = extract_decision_from_text(decision_result)
         if extracted_decision:
             st.info("✅ 成功从文本中提取决策信息")
-            display_decision_content(**extracted_decision)
+            display_decision_content(extracted_decision, use_api=use_api)
         else:
             st.error("无法从文本中提取有效决策信息")
             display_fallback_decision()
@@ -1117,6 +1544,15 @@ def display_investment_decision_with_api_translation(decision_result):
             # 显示原始内容供调试
             with st.expander("📋 原始返回内容", expanded=False):
                 st.text(decision_result)
+        return
+    
+    try:
+        # 验证必要字段
+        if not isinstance(decision, dict):
+            raise ValueError("决策结果不是有效的字典格式")
+        
+        # 显示决策结果（使用API翻译）
+        display_decision_content(_decision_view(decision), use_api=use_api)
     
     except Exception as e:
         st.error(f"❌ 处理投资决策时出错: {str(e)}")
@@ -1125,46 +1561,42 @@ def display_investment_decision_with_api_translation(decision_result):
         # 显示原始内容供调试
         with st.expander("📋 原始返回内容", expanded=False):
             st.text(decision_result)
-    
-    finally:
-        # 恢复API翻译状态
-        if translation_mode == "简单映射":
-            API_TRANSLATION_AVAILABLE = temp_api_status
 
+@_fragment
 def add_translation_controls_to_main():
-    """在主界面添加翻译控制"""
-    st.sidebar.subheader("🌐 翻译设置")
+    """在侧边栏添加翻译控制（需在 st.sidebar 上下文中调用；作为 fragment 时按钮交互只重跑本区域）"""
+    st.subheader("🌐 翻译设置")
     
     # API翻译状态
     api_status = "✅ 可用" if API_TRANSLATION_AVAILABLE else "❌ 不可用"
-    st.sidebar.info(f"API翻译: {api_status}")
+    st.info(f"API翻译: {api_status}")
     
     # 翻译统计
-    if st.sidebar.button("📊 查看翻译统计"):
+    if st.button("📊 查看翻译统计"):
         stats = get_translation_stats()
-        st.sidebar.json(stats)
+        st.json(stats)
     
     # 测试翻译
-    if st.sidebar.button("🧪 测试翻译系统"):
+    if st.button("🧪 测试翻译系统"):
         test_translation_system()
-        st.sidebar.success("测试完成，请查看控制台输出")
+        st.success("测试完成，请查看控制台输出")
     
     # 缓存管理
-    if st.sidebar.button("🗑️ 清除翻译缓存"):
+    if st.button("🗑️ 清除翻译缓存"):
         if clear_translation_cache():
-            st.sidebar.success("翻译缓存已清除")
+            st.success("翻译缓存已清除")
         else:
-            st.sidebar.error("清除缓存失败")
+            st.error("清除缓存失败")
     
     # 翻译设置
-    st.sidebar.markdown("**翻译选项**")
-    enable_api_translation = st.sidebar.checkbox(
+    st.markdown("**翻译选项**")
+    enable_api_translation = st.checkbox(
         "启用API翻译", 
         value=True,
         help="使用AI API进行智能翻译，提供更自然的中文表达"
     )
     
-    cache_translations = st.sidebar.checkbox(
+    cache_translations = st.checkbox(
         "缓存翻译结果", 
         value=True,
         help="缓存翻译结果以提高性能和节省API调用"
@@ -1175,6 +1607,137 @@ def add_translation_controls_to_main():
         'cache_translations': cache_translations
     }
 
+# Seconds between progress bar ticks while the AI analysis runs
+ANALYSIS_PROGRESS_INTERVAL = 0.5
+
+@functools.lru_cache(maxsize=None)
+def _analysis_executor():
+    """Process-wide pool for AI analyses; futures outlive the script run that submitted them"""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="analysis")
+
+def _run_hedge_fund_job(symbol, start_date, end_date, num_news, show_reasoning):
+    """Run the hedge fund workflow (no Streamlit calls, safe on the analysis pool)"""
+    run_hedge_fund = load_run_hedge_fund()
+    return run_hedge_fund(
+        ticker=symbol,
+        start_date=start_date,
+        end_date=end_date,
+        portfolio={"cash": 100000, "stock": 0},
+        show_reasoning=show_reasoning,
+        num_of_news=num_news
+    )
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_run_hedge_fund(symbol, start_date, end_date, num_news, _load=None):
+    """Hedge fund results for the same symbol, dates and news count
+    
+    Looked up and filled on the script thread (_cache_lookup / _cache_store);
+    show_reasoning only controls the agents' console output, so it is not part of the key.
+    """
+    return _load() if _load else _run_hedge_fund_job(symbol, start_date, end_date, num_news, False)
+
+@dataclass
+class PendingAnalysis:
+    """A submitted AI analysis: its future and the _cached_run_hedge_fund key to store the result under"""
+    future: concurrent.futures.Future
+    cache_args: tuple
+    from_cache: bool = False
+
+def submit_analysis(symbol, days_range, num_news, show_reasoning):
+    """Start the hedge fund analysis on a background thread, or reuse a cached result
+    
+    The workflow itself already runs the analyst agents in parallel.
+    """
+    # Import the workflow here so import errors surface on the script thread
+    load_run_hedge_fund()
+    end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=days_range)).strftime('%Y-%m-%d')
+    cache_args = (symbol, start_date, end_date, num_news)
+    
+    cached = _cache_lookup(_cached_run_hedge_fund, *cache_args)
+    if cached is not _CACHE_MISS:
+        future = concurrent.futures.Future()
+        future.set_result(cached)
+        return PendingAnalysis(future, cache_args, from_cache=True)
+    
+    future = _analysis_executor().submit(_run_hedge_fund_job, *cache_args, show_reasoning)
+    return PendingAnalysis(future, cache_args)
+
+def display_market_overview(symbol, result):
+    """Display basic info, chart, financial health and news (everything but the decision)"""
+    df = result['df']
+    financial_metrics = result['financial_metrics']
+    close = df['close'].to_numpy()
+    latest_price = close[-1] if close.size else None
+    
+    # Row 1: Basic info and chart
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        display_basic_info(symbol, result['market_data'], financial_metrics, latest_price)
+    
+    with col2:
+        # Create and display chart
+        fig = _cached_candlestick_chart(df, symbol, _price_fingerprint(df))
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.error("无法创建价格图表")
+    
+    # Row 2: Financial health
+    display_financial_health(financial_metrics)
+    
+    # Row 3: News and sentiment
+    display_news_summary(result['news_list'], result['sentiment_score'])
+
+def display_analysis_results(symbol, result):
+    """Display a completed analysis (as stored in session_state by main)"""
+    display_market_overview(symbol, result)
+    
+    # Row 4: Investment decision
+    display_investment_decision(result['decision_result'])
+
+def run_analysis(symbol, days_range, num_news, pending, progress_bar):
+    """Fetch and show the market data, then wait for the AI decision of a PendingAnalysis
+    
+    Returns the complete result dict, or None when no price data is available.
+    """
+    data = fetch_all_data(symbol, days_range, num_news, datetime.now().date())
+    for kind, label in (('price', '股票'), ('financial', '财务'), ('news', '新闻')):
+        if kind in data.errors:
+            st.error(f"获取{label}数据失败: {data.errors[kind]}")
+    
+    if data.df is None or data.df.empty:
+        st.error("无法获取股票数据，请检查股票代码")
+        return None
+    
+    result = {
+        'df': data.df,
+        'financial_metrics': data.financial_metrics,
+        'market_data': data.market_data,
+        'news_list': data.news_list,
+        'sentiment_score': data.sentiment_score,
+    }
+    
+    # Show the market data while the AI analysis is still running
+    display_market_overview(symbol, result)
+    
+    progress = 50
+    progress_bar.progress(progress, text="正在运行AI分析...")
+    while not concurrent.futures.wait([pending.future], timeout=ANALYSIS_PROGRESS_INTERVAL).done:
+        if progress < 95:
+            progress += 1
+            progress_bar.progress(progress, text="正在运行AI分析...")
+    progress_bar.empty()
+    
+    decision_result = pending.future.result()
+    if not pending.from_cache:
+        # Cache on the script thread; the analysis pool never calls Streamlit
+        decision_result = _cache_store(_cached_run_hedge_fund, decision_result, *pending.cache_args)
+    result['decision_result'] = decision_result
+    display_investment_decision(result['decision_result'])
+    return result
+
 def main():
     """Main application"""
     
@@ -1211,100 +1774,47 @@ def main():
         
         # API status
         st.subheader("系统状态")
-        api_provider = os.getenv('API_PROVIDER', 'unknown')
-        model_name = os.getenv('MODEL_NAME', 'unknown')
+        active_config = get_active_config()
+        api_provider = active_config['api_provider'] or 'unknown'
+        model_name = active_config['model_name'] or 'unknown'
         st.info(f"API提供商: {api_provider}")
         st.info(f"模型: {model_name}")
 
-        translation_settings = add_translation_controls_to_main()
+        add_translation_controls_to_main()
 
     
     # Main content area
+    # Analysis results are kept per (symbol, days_range, num_news); only the
+    # analyze button re-runs the analysis, other widget changes reuse them
+    result_key = f"result:{symbol}:{days_range}:{num_news}"
+    
+    # The pending AI analysis is kept in session_state until it has been
+    # shown, so widget changes during a run pick it up instead of losing it
+    pending_key = f"pending:{result_key}"
+    
     if analyze_button and symbol:
         # Validate stock code
         if not symbol.isdigit() or len(symbol) != 6:
             st.error("请输入有效的6位股票代码")
             return
         
-        # Progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # Start the AI analysis right away; it runs while the data is fetched and shown
+        try:
+            st.session_state[pending_key] = submit_analysis(symbol, days_range, num_news, show_reasoning)
+        except Exception as e:
+            st.error(f"分析过程中出现错误: {str(e)}")
+            return
+    
+    if symbol and pending_key in st.session_state:
+        # Progress tracking (status text rides on the progress bar itself)
+        progress_bar = st.progress(10, text="正在获取股票、财务和新闻数据...")
         
         try:
-            # Step 1: Fetch stock data
-            status_text.text("正在获取股票数据...")
-            progress_bar.progress(20)
-            
-            df = fetch_stock_data(symbol, days_range)
-            if df is None or df.empty:
-                st.error("无法获取股票数据，请检查股票代码")
-                return
-            
-            latest_price = df['close'].iloc[-1] if not df.empty else None
-            
-            # Step 2: Fetch financial data
-            status_text.text("正在获取财务数据...")
-            progress_bar.progress(40)
-            
-            financial_metrics, market_data = fetch_financial_data(symbol)
-            
-            # Step 3: Fetch news data
-            status_text.text("正在分析新闻情绪...")
-            progress_bar.progress(60)
-            
-            news_list, sentiment_score = fetch_news_data(symbol, num_news)
-            
-            # Step 4: Run AI analysis
-            status_text.text("正在运行AI分析...")
-            progress_bar.progress(80)
-            
-            # Prepare date range for analysis
-            end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=days_range)).strftime('%Y-%m-%d')
-            
-            # Run the hedge fund analysis
-            portfolio = {"cash": 100000, "stock": 0}
-            decision_result = run_hedge_fund(
-                ticker=symbol,
-                start_date=start_date,
-                end_date=end_date,
-                portfolio=portfolio,
-                show_reasoning=show_reasoning,
-                num_of_news=num_news
-            )
-            
-            progress_bar.progress(100)
-            status_text.text("分析完成！")
-            
-            # Clear progress indicators
-            time.sleep(1)
-            progress_bar.empty()
-            status_text.empty()
-            
-            # Display results
-            
-            # Row 1: Basic info and chart
-            col1, col2 = st.columns([1, 2])
-            
-            with col1:
-                display_basic_info(symbol, market_data, financial_metrics, latest_price)
-            
-            with col2:
-                # Create and display chart
-                fig = create_candlestick_chart(df, symbol)
-                if fig:
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.error("无法创建价格图表")
-            
-            # Row 2: Financial health
-            display_financial_health(financial_metrics)
-            
-            # Row 3: News and sentiment
-            display_news_summary(news_list, sentiment_score)
-            
-            # Row 4: Investment decision
-            display_investment_decision(decision_result)
+            result = run_analysis(symbol, days_range, num_news,
+                                  st.session_state[pending_key], progress_bar)
+            if result is not None:
+                # Keep the result for reruns triggered by other widgets
+                st.session_state[result_key] = result
             
         except Exception as e:
             st.error(f"分析过程中出现错误: {str(e)}")
@@ -1313,7 +1823,12 @@ def main():
         
         finally:
             progress_bar.empty()
-            status_text.empty()
+        
+        # Not reached when a rerun interrupts the wait, so the future is resumed then
+        del st.session_state[pending_key]
+    
+    elif symbol and result_key in st.session_state:
+        display_analysis_results(symbol, st.session_state[result_key])
     
     elif not symbol:
         # Welcome screen